@@ -0,0 +1,326 @@
+""" Dependencies between the Boost libraries (Boost 1.66)."""
+
+# The header dependencies between the Boost modules (the libs/ submodules of the superproject),
+# as reported by boostdep (primary dependencies, tests and examples excluded).
+# The modules in a subfolder of libs/ use the boostdep notation: numeric~conversion is
+# libs/numeric/conversion.
+BOOST_DEPS = {
+    "accumulators": ["array", "assert", "circular_buffer", "concept_check", "config", "core",
+                     "fusion", "iterator", "mpl", "numeric~conversion", "numeric~ublas",
+                     "parameter", "preprocessor", "range", "static_assert", "serialization",
+                     "throw_exception", "tuple", "type_traits", "typeof"],
+    "algorithm": ["array", "assert", "bind", "concept_check", "config", "core", "exception",
+                  "function", "iterator", "mpl", "range", "regex", "static_assert", "tuple",
+                  "type_traits", "unordered"],
+    "align": ["assert", "config", "core", "static_assert", "throw_exception"],
+    "any": ["config", "core", "static_assert", "throw_exception", "type_index", "type_traits"],
+    "array": ["assert", "config", "core", "functional", "static_assert", "throw_exception"],
+    "asio": ["array", "assert", "bind", "chrono", "config", "core", "coroutine", "date_time",
+             "function", "regex", "smart_ptr", "system", "throw_exception", "type_traits",
+             "utility", "winapi"],
+    "assert": ["config"],
+    "assign": ["array", "config", "core", "detail", "mpl", "preprocessor", "ptr_container",
+               "range", "static_assert", "throw_exception", "tuple", "type_traits"],
+    "atomic": ["assert", "config", "type_traits"],
+    "beast": ["asio", "assert", "bind", "config", "container", "core", "endian", "intrusive",
+              "optional", "smart_ptr", "static_assert", "system", "throw_exception",
+              "type_traits", "utility", "winapi"],
+    "bimap": ["concept_check", "config", "core", "functional", "iterator", "lambda", "mpl",
+              "multi_index", "preprocessor", "property_map", "serialization", "static_assert",
+              "throw_exception", "type_traits", "utility"],
+    "bind": ["config", "core"],
+    "callable_traits": [],
+    "chrono": ["assert", "config", "core", "integer", "move", "mpl", "predef", "ratio",
+               "static_assert", "system", "throw_exception", "type_traits", "typeof", "utility",
+               "winapi"],
+    "circular_buffer": ["assert", "concept_check", "config", "core", "move", "static_assert",
+                        "throw_exception", "type_traits"],
+    "compatibility": [],
+    "compute": ["algorithm", "array", "assert", "chrono", "config", "core", "filesystem",
+                "function", "function_types", "fusion", "iterator", "lexical_cast", "mpl",
+                "optional", "preprocessor", "property_tree", "proto", "range", "smart_ptr",
+                "static_assert", "thread", "throw_exception", "tuple", "type_traits", "typeof",
+                "utility", "uuid"],
+    "concept_check": ["config", "preprocessor", "static_assert", "type_traits"],
+    "config": [],
+    "container": ["assert", "config", "core", "intrusive", "move", "static_assert",
+                  "type_traits"],
+    "context": ["assert", "config", "pool", "predef", "smart_ptr", "thread"],
+    "conversion": ["assert", "config", "core", "smart_ptr", "throw_exception", "type_traits",
+                   "typeof"],
+    "convert": ["config", "core", "function_types", "lexical_cast", "math", "mpl", "optional",
+                "parameter", "range", "spirit", "type_traits"],
+    "core": ["assert", "config"],
+    "coroutine": ["assert", "config", "context", "core", "exception", "move", "range", "system",
+                  "thread", "throw_exception", "type_traits", "utility"],
+    "coroutine2": ["assert", "config", "context"],
+    "crc": ["array", "config", "integer", "type_traits"],
+    "date_time": ["algorithm", "assert", "config", "core", "io", "lexical_cast", "mpl",
+                  "range", "serialization", "smart_ptr", "static_assert", "throw_exception",
+                  "tokenizer", "type_traits", "utility", "winapi"],
+    "detail": ["config", "core", "preprocessor", "static_assert", "type_traits"],
+    "disjoint_sets": ["graph"],
+    "dll": ["config", "core", "filesystem", "function", "move", "predef", "smart_ptr",
+            "spirit", "static_assert", "system", "throw_exception", "type_index",
+            "type_traits", "winapi"],
+    "dynamic_bitset": ["config", "core", "integer", "move", "serialization", "static_assert",
+                       "throw_exception"],
+    "endian": ["config", "core", "predef", "static_assert", "type_traits", "utility"],
+    "exception": ["assert", "config", "core", "smart_ptr", "tuple", "type_traits"],
+    "fiber": ["algorithm", "assert", "config", "context", "core", "filesystem", "format",
+              "intrusive", "predef", "smart_ptr"],
+    "filesystem": ["assert", "config", "core", "detail", "functional", "io", "iterator", "mpl",
+                   "range", "smart_ptr", "static_assert", "system", "type_traits"],
+    "flyweight": ["assert", "config", "core", "detail", "functional", "interprocess", "mpl",
+                  "multi_index", "parameter", "preprocessor", "serialization", "smart_ptr",
+                  "static_assert", "throw_exception", "type_traits", "utility"],
+    "foreach": ["config", "core", "iterator", "mpl", "range", "type_traits"],
+    "format": ["assert", "config", "core", "optional", "smart_ptr", "throw_exception",
+               "utility"],
+    "function": ["assert", "bind", "config", "core", "integer", "preprocessor", "throw_exception",
+                 "type_index", "type_traits", "typeof"],
+    "function_types": ["config", "core", "detail", "mpl", "preprocessor", "type_traits"],
+    "functional": ["config", "core", "detail", "integer", "mpl", "preprocessor",
+                   "static_assert", "type_traits", "typeof", "utility"],
+    "fusion": ["config", "core", "function_types", "functional", "mpl", "preprocessor",
+               "static_assert", "tuple", "type_traits", "typeof", "utility"],
+    "geometry": ["algorithm", "array", "assert", "concept_check", "config", "container",
+                 "core", "function_types", "fusion", "integer", "iterator", "lexical_cast",
+                 "math", "move", "mpl", "multiprecision", "numeric~conversion", "polygon",
+                 "qvm", "range", "rational", "serialization", "smart_ptr", "static_assert",
+                 "thread", "throw_exception", "tokenizer", "tuple", "type_traits", "variant"],
+    "gil": ["bind", "concept_check", "config", "core", "crc", "filesystem", "function",
+            "integer", "iterator", "lambda", "mpl", "preprocessor", "static_assert",
+            "type_traits"],
+    "graph": ["algorithm", "any", "array", "assert", "bimap", "bind", "concept_check", "config",
+              "conversion", "core", "disjoint_sets", "foreach", "function", "functional",
+              "integer", "iterator", "lexical_cast", "math", "move", "mpl", "multi_index",
+              "optional", "parameter", "preprocessor", "property_map", "property_tree",
+              "random", "range", "regex", "serialization", "smart_ptr", "spirit",
+              "static_assert", "throw_exception", "tti", "tuple", "type_traits", "typeof",
+              "unordered", "utility", "xpressive"],
+    "graph_parallel": ["assert", "concept_check", "config", "core", "detail", "dynamic_bitset",
+                       "filesystem", "foreach", "function", "graph", "iterator", "lexical_cast",
+                       "mpi", "mpl", "optional", "property_map", "random", "serialization",
+                       "smart_ptr", "static_assert", "tuple", "type_traits", "variant"],
+    "hana": ["config", "core", "fusion", "mpl", "tuple"],
+    "heap": ["array", "assert", "bind", "concept_check", "config", "intrusive", "iterator",
+             "parameter", "static_assert", "throw_exception", "type_traits"],
+    "icl": ["assert", "concept_check", "config", "container", "date_time", "detail",
+            "iterator", "move", "mpl", "range", "rational", "static_assert", "type_traits",
+            "utility"],
+    "integer": ["assert", "config", "core", "static_assert"],
+    "interprocess": ["assert", "config", "container", "core", "date_time", "integer",
+                     "intrusive", "move", "static_assert", "type_traits", "unordered",
+                     "winapi"],
+    "intrusive": ["assert", "config", "core", "functional", "move", "static_assert"],
+    "io": ["config"],
+    "iostreams": ["assert", "bind", "config", "core", "detail", "function", "integer",
+                  "iterator", "mpl", "preprocessor", "random", "range", "regex",
+                  "smart_ptr", "static_assert", "throw_exception", "type_traits", "utility"],
+    "iterator": ["assert", "concept_check", "config", "conversion", "core", "detail",
+                 "function_types", "fusion", "mpl", "optional", "smart_ptr", "static_assert",
+                 "type_traits", "utility"],
+    "lambda": ["bind", "config", "core", "detail", "iterator", "mpl", "preprocessor",
+               "tuple", "type_traits", "utility"],
+    "lexical_cast": ["array", "assert", "config", "container", "core", "integer", "math",
+                     "mpl", "numeric~conversion", "range", "static_assert", "throw_exception",
+                     "type_traits"],
+    "local_function": ["config", "mpl", "preprocessor", "scope_exit", "type_traits", "typeof",
+                       "utility"],
+    "locale": ["assert", "config", "function", "iterator", "smart_ptr", "static_assert",
+               "thread", "type_traits", "unordered"],
+    "lockfree": ["align", "array", "assert", "atomic", "config", "core", "integer", "mpl",
+                 "parameter", "predef", "static_assert", "tuple", "type_traits", "utility"],
+    "log": ["align", "array", "asio", "assert", "atomic", "bind", "config", "container",
+            "core", "date_time", "exception", "filesystem", "function_types", "fusion",
+            "intrusive", "io", "iterator", "lexical_cast", "locale", "move", "mpl", "optional",
+            "parameter", "phoenix", "predef", "preprocessor", "property_tree", "proto",
+            "random", "range", "regex", "smart_ptr", "spirit", "static_assert", "system",
+            "thread", "throw_exception", "type_index", "type_traits", "utility", "winapi",
+            "xpressive"],
+    "logic": ["config", "core"],
+    "math": ["array", "assert", "atomic", "concept_check", "config", "core", "detail",
+             "fusion", "integer", "lambda", "lexical_cast", "mpl", "predef", "range",
+             "static_assert", "throw_exception", "tuple", "type_traits"],
+    "metaparse": ["config", "mpl", "predef", "preprocessor", "static_assert", "type_traits"],
+    "move": ["assert", "config", "core", "static_assert"],
+    "mp11": [],
+    "mpi": ["assert", "config", "core", "function", "graph", "integer", "iterator",
+            "lexical_cast", "mpl", "optional", "python", "serialization", "smart_ptr",
+            "static_assert", "throw_exception", "type_traits"],
+    "mpl": ["config", "core", "predef", "preprocessor", "static_assert", "type_traits",
+            "utility"],
+    "msm": ["any", "assert", "bind", "circular_buffer", "config", "core", "function", "fusion",
+            "mpl", "parameter", "phoenix", "preprocessor", "proto", "serialization",
+            "type_traits", "typeof"],
+    "multi_array": ["array", "assert", "concept_check", "config", "core", "functional",
+                    "iterator", "mpl", "static_assert", "type_traits"],
+    "multi_index": ["assert", "bind", "config", "core", "detail",
+                    "foreach", "functional", "integer", "iterator", "move", "mpl",
+                    "preprocessor", "serialization", "smart_ptr", "static_assert", "tuple",
+                    "type_traits", "utility"],
+    "multiprecision": ["array", "assert", "config", "core", "functional", "integer",
+                       "lexical_cast", "math", "mpl", "predef", "rational", "smart_ptr",
+                       "static_assert", "throw_exception", "type_traits"],
+    "numeric~conversion": ["config", "conversion", "core", "mpl", "preprocessor",
+                           "throw_exception", "type_traits"],
+    "numeric~interval": ["config", "detail", "logic"],
+    "numeric~odeint": ["array", "assert", "bind", "compute", "config", "core", "fusion",
+                       "iterator", "math", "mpl", "multi_array", "numeric~ublas", "range",
+                       "static_assert", "throw_exception", "type_traits", "units", "utility"],
+    "numeric~ublas": ["concept_check", "config", "core", "iterator", "mpl", "range",
+                      "serialization", "smart_ptr", "static_assert", "type_traits", "typeof"],
+    "optional": ["assert", "config", "core", "detail", "move", "mpl", "static_assert",
+                 "throw_exception", "type_traits", "utility"],
+    "parameter": ["config", "core", "detail", "mpl", "optional", "preprocessor",
+                  "type_traits", "utility"],
+    "phoenix": ["assert", "bind", "config", "core", "function", "fusion", "mpl", "predef",
+                "preprocessor", "proto", "range", "smart_ptr", "type_traits", "utility"],
+    "poly_collection": ["assert", "config", "core", "iterator", "mpl", "type_erasure",
+                        "type_traits"],
+    "polygon": ["config"],
+    "pool": ["assert", "config", "integer", "thread", "throw_exception", "type_traits",
+             "winapi"],
+    "predef": [],
+    "preprocessor": [],
+    "process": ["algorithm", "asio", "config", "core", "filesystem", "fusion", "iterator",
+                "move", "optional", "system", "tokenizer", "type_index", "winapi"],
+    "program_options": ["any", "config", "core", "detail", "function", "iterator",
+                        "lexical_cast", "smart_ptr", "static_assert", "throw_exception",
+                        "tokenizer", "type_traits"],
+    "property_map": ["any", "assert", "bind", "concept_check", "config", "core", "function",
+                     "iterator", "lexical_cast", "mpl", "smart_ptr", "static_assert",
+                     "throw_exception", "type_traits", "utility"],
+    "property_tree": ["any", "assert", "bind", "config", "core", "format", "iterator",
+                      "mpl", "multi_index", "optional", "range", "serialization", "spirit",
+                      "static_assert", "throw_exception", "type_traits"],
+    "proto": ["config", "core", "fusion", "mpl", "preprocessor", "range", "static_assert",
+              "type_traits", "typeof", "utility"],
+    "ptr_container": ["array", "assert", "circular_buffer", "config", "core", "iterator",
+                      "mpl", "range", "serialization", "smart_ptr", "static_assert",
+                      "type_traits", "unordered", "utility"],
+    "python": ["bind", "config", "conversion", "core", "detail", "foreach", "function",
+               "graph", "integer", "iterator", "lexical_cast", "mpl", "numeric~conversion",
+               "preprocessor", "property_map", "smart_ptr", "static_assert", "tuple",
+               "type_traits", "utility"],
+    "qvm": ["assert", "config", "core", "exception", "static_assert", "throw_exception",
+            "utility"],
+    "random": ["assert", "config", "core", "detail", "integer", "math", "mpl", "range",
+               "static_assert", "system", "throw_exception", "type_traits", "utility"],
+    "range": ["array", "assert", "concept_check", "config", "core", "detail", "functional",
+              "iterator", "mpl", "optional", "preprocessor", "regex", "static_assert", "tuple",
+              "type_traits", "utility"],
+    "ratio": ["config", "core", "integer", "mpl", "rational", "static_assert", "type_traits"],
+    "rational": ["assert", "config", "core", "integer", "static_assert", "throw_exception",
+                 "type_traits", "utility"],
+    "regex": ["assert", "concept_check", "config", "core", "detail",
+              "functional", "integer", "iterator", "mpl", "predef", "smart_ptr",
+              "static_assert", "throw_exception", "type_traits"],
+    "scope_exit": ["config", "function", "preprocessor", "type_traits", "typeof"],
+    "serialization": ["array", "assert", "config", "core", "detail", "function", "integer",
+                      "io", "iterator", "move", "mpl", "optional", "predef", "preprocessor",
+                      "smart_ptr", "spirit", "static_assert", "type_traits", "unordered",
+                      "utility", "variant"],
+    "signals": ["any", "config", "core", "function", "iterator", "optional", "smart_ptr",
+                "type_traits", "utility"],
+    "signals2": ["assert", "bind", "config", "core", "function", "iterator", "mpl", "optional",
+                 "parameter", "predef", "preprocessor", "smart_ptr", "throw_exception",
+                 "tuple", "type_traits", "variant"],
+    "smart_ptr": ["assert", "config", "core", "move", "predef", "static_assert",
+                  "throw_exception", "type_traits"],
+    "sort": ["config", "range", "serialization", "static_assert", "type_traits"],
+    "spirit": ["array", "assert", "config", "core", "endian", "filesystem", "foreach",
+               "function", "function_types", "fusion", "integer", "io", "iostreams",
+               "iterator", "math", "move", "mpl", "optional", "phoenix", "pool",
+               "preprocessor", "proto", "range", "regex", "smart_ptr", "static_assert",
+               "thread", "throw_exception", "type_traits", "typeof", "unordered", "utility",
+               "variant"],
+    "stacktrace": ["array", "config", "core", "predef", "static_assert",
+                   "type_traits", "winapi"],
+    "statechart": ["assert", "bind", "config", "conversion", "core", "detail", "function",
+                   "mpl", "smart_ptr", "static_assert", "thread", "type_traits"],
+    "static_assert": ["config"],
+    "system": ["config", "core", "predef", "winapi"],
+    "test": ["algorithm", "assert", "bind", "config", "core", "detail", "exception",
+             "function", "io", "iterator", "mpl", "numeric~conversion", "optional",
+             "preprocessor", "smart_ptr", "static_assert", "timer", "type_traits", "utility"],
+    "thread": ["assert", "atomic", "bind", "chrono", "concept_check", "config", "container",
+               "core", "date_time", "exception", "function", "functional", "intrusive", "io",
+               "iterator", "lexical_cast", "move", "optional", "predef", "preprocessor",
+               "smart_ptr", "static_assert", "system", "throw_exception", "tuple",
+               "type_traits", "utility", "winapi"],
+    "throw_exception": ["assert", "config"],
+    "timer": ["chrono", "config", "core", "io", "system", "throw_exception"],
+    "tokenizer": ["assert", "config", "iterator", "mpl", "throw_exception", "type_traits"],
+    "tti": ["config", "function_types", "mpl", "preprocessor", "type_traits"],
+    "tuple": ["config", "core", "static_assert", "type_traits"],
+    "type_erasure": ["assert", "config", "core", "fusion", "iterator", "mp11", "mpl",
+                     "preprocessor", "smart_ptr", "thread", "throw_exception", "type_traits",
+                     "typeof", "vmd"],
+    "type_index": ["config", "core", "functional", "mpl", "preprocessor", "smart_ptr",
+                   "static_assert", "throw_exception", "type_traits"],
+    "type_traits": ["config", "core", "static_assert"],
+    "typeof": ["config", "mpl", "preprocessor", "type_traits"],
+    "units": ["assert", "config", "core", "integer", "io", "lambda", "math", "mpl",
+              "preprocessor", "serialization", "static_assert", "type_traits", "typeof"],
+    "unordered": ["assert", "config", "container", "core", "detail",
+                  "functional", "iterator", "move", "predef", "preprocessor", "smart_ptr",
+                  "throw_exception", "tuple", "type_traits", "utility"],
+    "utility": ["config", "core", "detail", "preprocessor", "static_assert",
+                "throw_exception", "type_traits"],
+    "uuid": ["assert", "config", "core", "io", "move", "predef", "random", "serialization",
+             "smart_ptr", "static_assert", "throw_exception", "tti", "type_traits",
+             "winapi"],
+    "variant": ["assert", "bind", "config", "core", "detail",
+                "functional", "integer", "math", "move", "mpl", "preprocessor",
+                "static_assert", "throw_exception", "type_index", "type_traits", "utility"],
+    "vmd": ["preprocessor"],
+    "wave": ["assert", "concept_check", "config", "core", "filesystem", "iterator", "mpl",
+             "multi_index", "pool", "preprocessor", "serialization", "smart_ptr", "spirit",
+             "static_assert", "throw_exception", "type_traits"],
+    "winapi": ["config", "predef"],
+    "xpressive": ["assert", "config", "conversion", "core", "exception", "fusion",
+                  "integer", "iterator", "lexical_cast", "mpl", "optional", "preprocessor",
+                  "proto", "range", "smart_ptr", "static_assert", "throw_exception",
+                  "type_traits", "typeof", "utility"],
+}
+
+# The compiled libraries needed to link with each compiled library (see the
+# _Boost_<LIB>_DEPENDENCIES of FindBoost.cmake and the <library> requirements of the Jamfiles).
+# The libraries not listed only need their own binaries.
+LIBRARY_DEPS = {
+    "chrono": ["system"],
+    "context": ["thread", "chrono", "system", "date_time"],
+    "coroutine": ["context", "system"],
+    "fiber": ["context", "thread", "chrono", "system", "date_time"],
+    "filesystem": ["system"],
+    "graph": ["regex"],
+    "graph_parallel": ["mpi", "serialization", "system"],
+    "iostreams": ["regex"],
+    "locale": ["thread", "system"],
+    "log": ["date_time", "system", "filesystem", "thread", "regex", "chrono", "atomic"],
+    "math": ["atomic"],
+    "mpi": ["serialization"],
+    "random": ["system"],
+    "thread": ["chrono", "system", "date_time", "atomic"],
+    "timer": ["chrono", "system"],
+    "type_erasure": ["thread", "chrono", "system"],
+    "wave": ["filesystem", "system", "serialization", "thread", "chrono", "date_time", "atomic"],
+}
+
+def module_path(module):
+    """ The path of a module submodule in the superproject."""
+    return "libs/%s" % module.replace("~", "/")
+
+def dependency_closure(modules, dependencies=None):
+    """ The modules together with all their direct and indirect dependencies."""
+    dependencies = BOOST_DEPS if dependencies is None else dependencies
+    closure = set()
+    pending = list(modules)
+    while pending:
+        module = pending.pop()
+        if module not in closure:
+            closure.add(module)
+            pending.extend(dependencies.get(module, []))
+    return closure
@@ -0,0 +1,52 @@
+""" Compares the test_package benchmark results (CONAN_BOOST_BENCHMARK) of two packages.
+Exits with 1 when a benchmark of the candidate is slower than the baseline by more than the
+threshold. """
+import argparse
+import json
+import sys
+
+
+def _describe(results):
+    settings = ", ".join("%s=%s" % item for item in sorted(results["settings"].items()))
+    options = ", ".join("%s=%s" % item for item in sorted(results["options"].items()))
+    return "%s:%s\n    settings: %s\n    options: %s" % (results["version"],
+                                                         results["package_id"], settings, options)
+
+def compare(baseline, candidate, threshold):
+    """ Prints the benchmarks side by side and returns the names of the regressions."""
+    baseline_values = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    print("Baseline:  %s" % _describe(baseline))
+    print("Candidate: %s" % _describe(candidate))
+    print("")
+    print("%-24s %14s %14s %8s" % ("benchmark", "baseline", "candidate", "change"))
+    for result in candidate["results"]:
+        base = baseline_values.get(result["name"])
+        if not base:
+            print("%-24s %14s %14.4g %8s  %s" % (result["name"], "-", result["value"], "",
+                                                 result["unit"]))
+            continue
+        change = (result["value"] - base["value"]) / base["value"] if base["value"] else 0.0
+        regression = change < -threshold
+        if regression:
+            regressions.append(result["name"])
+        print("%-24s %14.4g %14.4g %+7.1f%%  %s%s" % (result["name"], base["value"],
+                                                      result["value"], change * 100,
+                                                      result["unit"],
+                                                      "  REGRESSION" if regression else ""))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline", help="Benchmark results of the reference package")
+    parser.add_argument("candidate", help="Benchmark results of the compared package")
+    parser.add_argument("--threshold", type=float, default=5.0,
+                        help="Slowdown (percent) reported as a regression (default: 5)")
+    args = parser.parse_args()
+
+    with open(args.baseline, "r") as fin:
+        baseline_results = json.load(fin)
+    with open(args.candidate, "r") as fin:
+        candidate_results = json.load(fin)
+    if compare(baseline_results, candidate_results, args.threshold / 100.0):
+        sys.exit(1)
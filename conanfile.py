@@ -1,11 +1,25 @@
 """ Conan recipe for Boost."""
+import csv
+import filecmp
+import fnmatch
+import glob
+import hashlib
+import json
 import os
 import platform
+import re
 import shutil
+import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import fasteners
 from conans import ConanFile
 from conans import tools
 from conan_utils.compiler_version import check_gpp_version, check_clangpp_version
+from boost_deps import BOOST_DEPS, LIBRARY_DEPS, dependency_closure, module_path
 
 if (sys.version_info.major, sys.version_info.minor) < (3, 5):
     raise RuntimeError("Python 3.5 is required")
@@ -20,10 +34,417 @@ LIB_LIST = ['math', 'wave', 'container', 'exception', 'graph', 'iostreams', 'loc
             'atomic', 'filesystem', 'system', 'graph_parallel', 'python',
             'stacktrace', 'test', 'type_erasure']
 
+# System libraries the consumers of the static libraries link with, by os and module
+LIBRARY_SYSTEM_LIBS = {
+    "Linux": {"chrono": ["rt"], "fiber": ["pthread"], "locale": ["pthread"],
+              "log": ["pthread", "rt"], "stacktrace": ["dl"], "thread": ["pthread", "rt"],
+              "timer": ["rt"]},
+    "Windows": {"log": ["ws2_32", "mswsock"], "stacktrace": ["ole32", "dbgeng"]}
+}
+
+# Modules needed by the build system itself, whatever the libraries
+BUILD_MODULES = ['config', 'predef']
+
+# x86-64 microarchitecture levels, as gcc/clang feature flags (the -march=x86-64-vN spelling
+# needs gcc 11 / clang 12) and as the MSVC /arch flag (SSE4.2 has none)
+MARCH_LEVELS = {
+    "x86-64-v2": (["-march=x86-64", "-mcx16", "-msahf", "-mpopcnt", "-msse3", "-mssse3",
+                   "-msse4.1", "-msse4.2"], None),
+    "x86-64-v3": (["-march=x86-64", "-mcx16", "-msahf", "-mpopcnt", "-msse3", "-mssse3",
+                   "-msse4.1", "-msse4.2", "-mavx", "-mavx2", "-mbmi", "-mbmi2", "-mf16c", "-mfma",
+                   "-mlzcnt", "-mmovbe", "-mxsave"], "/arch:AVX2"),
+    "x86-64-v4": (["-march=x86-64", "-mcx16", "-msahf", "-mpopcnt", "-msse3", "-mssse3",
+                   "-msse4.1", "-msse4.2", "-mavx", "-mavx2", "-mbmi", "-mbmi2", "-mf16c", "-mfma",
+                   "-mlzcnt", "-mmovbe", "-mxsave", "-mavx512f", "-mavx512bw", "-mavx512cd",
+                   "-mavx512dq", "-mavx512vl"], "/arch:AVX512")
+}
+
+# Estimated peak memory (GB) of a compile job of the template heavy libraries, the others use
+# DEFAULT_COMPILE_MEMORY
+LIBRARY_COMPILE_MEMORY = {"log": 2.0, "wave": 2.0, "graph": 1.5, "graph_parallel": 1.5,
+                          "locale": 1.0, "serialization": 1.0, "python": 1.0, "math": 1.0,
+                          "test": 1.0, "type_erasure": 1.0}
+DEFAULT_COMPILE_MEMORY = 0.5
+
+# Units compiled on their own by the unity build: they clash with other units of their library
+# (anonymous namespaces, static names or macros, sources instantiated for several char types)
+# or set feature test macros before their includes (filesystem operations: large file support).
+# The units under "*" are excluded for all the libraries; the units defining macros before
+# their first include are also excluded (see _defines_before_includes).
+UNITY_EXCLUDED_UNITS = {
+    "*": ["utf8_codecvt_facet"],
+    "locale": ["codecvt", "collate", "converter", "numeric", "all_generator", "std_backend",
+               "posix_backend", "win_backend", "icu_backend"],
+    "filesystem": ["operations"],
+    "log": ["dump_avx2", "dump_ssse3", "init_from_settings", "init_from_stream",
+            "settings_parser"],
+    "regex": ["instances", "winstances", "posix_api", "wide_posix_api"],
+    "serialization": ["xml_grammar", "xml_wgrammar"],
+    "thread": ["once", "once_atomic"],
+    "wave": ["instantiate_re2c_lexer", "instantiate_re2c_lexer_str", "cpp_re"],
+}
+
 def _remove_if_exists(file):
     if os.path.exists(file) and os.path.isfile(file):
         os.remove(file)
 
+def _cache_folder(*names):
+    """ A folder in the machine-wide cache shared by all the builds of this recipe."""
+    cache_root = tools.get_env("CONAN_BOOST_CACHE_DIR",
+                               os.path.join(os.path.expanduser("~"), ".conan", "boost_cache"))
+    folder = os.path.join(cache_root, *names)
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+def _hash_folder(folder, skip_prefixes=()):
+    """ Hash of the relative paths and contents of the files in a folder."""
+    sha = hashlib.sha1()
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(tuple(skip_prefixes)))
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            sha.update(os.path.relpath(path, folder).replace(os.sep, "/").encode())
+            with open(path, "rb") as fin:
+                sha.update(fin.read())
+    return sha.hexdigest()
+
+def _install_file(src, dst):
+    """ Copies a file so that dst is never seen partially written."""
+    if os.path.isfile(dst) and filecmp.cmp(src, dst, shallow=False):
+        # Also avoids replacing an executable which may be running (Windows)
+        return
+    tmp_dst = "%s.%s.tmp" % (dst, os.getpid())
+    shutil.copy2(src, tmp_dst)
+    os.replace(tmp_dst, dst)
+
+class _B2ActionLog(object):
+    """ Output stream for b2 runs which forwards the output and timestamps the actions.
+    b2 prints an action (with its command line, because of -d2) when the action completes."""
+    ACTION_RE = re.compile(r"^(\w[\w-]*(?:\.[\w+-]+)+) (\S.*)$")
+    LIBRARY_RE = re.compile(r"[/\\]libs[/\\](\w+)[/\\]build[/\\]")
+    # Staged libraries: libboost_regex.a, boost_regex-vc141-mt-x64-1_66.dll, ...
+    STAGED_RE = re.compile(r"^(?:lib)?boost_([a-z_]+?)(?:-|$)")
+
+    def __init__(self, output):
+        self._output = output
+        self._pending = ""
+        self.runs = []
+
+    def begin_run(self, jobs):
+        self.runs.append({"start": time.time(), "jobs": jobs, "actions": []})
+
+    def write(self, data, *args, **kwargs):
+        self._output.write(data, *args, **kwargs)
+        lines = (self._pending + data).split("\n")
+        self._pending = lines.pop()
+        for line in lines:
+            match = self.ACTION_RE.match(line.rstrip())
+            if match and self.runs:
+                self.runs[-1]["actions"].append(
+                    {"end": time.time(), "rule": match.group(1), "target": match.group(2)})
+
+    def flush(self):
+        pass
+
+    def actions(self):
+        """ The actions of all runs, with their start estimated from the completion of the
+        action which freed the job slot."""
+        actions = []
+        for run_index, run in enumerate(self.runs):
+            ends = [action["end"] for action in run["actions"]]
+            for index, action in enumerate(run["actions"]):
+                start = ends[index - run["jobs"]] if index >= run["jobs"] else run["start"]
+                target = action["target"].strip('"')
+                unit = os.path.splitext(os.path.basename(target))[0]
+                match = self.LIBRARY_RE.search(target) or self.STAGED_RE.match(unit)
+                library = match.group(1) if match else "other"
+                actions.append({"run": run_index, "rule": action["rule"], "library": library,
+                                "unit": unit, "target": target, "start": start,
+                                "end": action["end"], "duration": action["end"] - start})
+        return actions
+
+def _build_profile(actions, timeline_step=1.0):
+    """ Summary of the b2 actions: slowest units, per library totals, critical path and
+    parallelism over time."""
+    if not actions:
+        return {}
+    build_start = min(action["start"] for action in actions)
+    build_end = max(action["end"] for action in actions)
+    wall_time = build_end - build_start
+    total_time = sum(action["duration"] for action in actions)
+
+    libraries = {}
+    for action in actions:
+        totals = libraries.setdefault(action["library"], {"actions": 0, "compile_time": 0.0,
+                                                          "total_time": 0.0})
+        totals["actions"] += 1
+        totals["total_time"] += action["duration"]
+        if ".compile." in action["rule"]:
+            totals["compile_time"] += action["duration"]
+
+    # Walking back from the last action: the libraries are archived/linked after their last
+    # compiled unit, the other actions wait for the action which freed their job slot.
+    critical_path = []
+    action = max(actions, key=lambda a: a["end"])
+    while action:
+        critical_path.append(action)
+        if ".compile." not in action["rule"] and action["library"] != "other":
+            candidates = [a for a in actions if a["library"] == action["library"] and
+                          ".compile." in a["rule"] and a["end"] <= action["start"]]
+        else:
+            candidates = [a for a in actions if a["end"] <= action["start"] and a is not action]
+        action = max(candidates, key=lambda a: a["end"]) if candidates else None
+    critical_path.reverse()
+
+    timeline = []
+    step_start = build_start
+    while step_start < build_end:
+        step_end = step_start + timeline_step
+        busy = sum(max(0.0, min(a["end"], step_end) - max(a["start"], step_start))
+                   for a in actions)
+        timeline.append({"time": round(step_start - build_start, 3),
+                         "parallelism": round(busy / timeline_step, 2)})
+        step_start = step_end
+
+    def _summary(action):
+        return {"library": action["library"], "unit": action["unit"], "rule": action["rule"],
+                "start": round(action["start"] - build_start, 3),
+                "duration": round(action["duration"], 3)}
+
+    compiles = [a for a in actions if ".compile." in a["rule"]]
+    return {
+        "wall_time": round(wall_time, 3),
+        "action_time": round(total_time, 3),
+        "average_parallelism": round(total_time / wall_time, 2) if wall_time else 0.0,
+        "slowest_units": [_summary(a) for a in
+                          sorted(compiles, key=lambda a: a["duration"], reverse=True)[:25]],
+        "libraries": {name: dict(totals, compile_time=round(totals["compile_time"], 3),
+                                 total_time=round(totals["total_time"], 3))
+                      for name, totals in libraries.items()},
+        "critical_path": [_summary(a) for a in critical_path],
+        "critical_path_time": round(sum(a["duration"] for a in critical_path), 3),
+        "timeline": timeline
+    }
+
+def _available_memory():
+    """ The memory (GB) available for the build, None if unknown."""
+    try:
+        if sys.platform.startswith("linux"):
+            with open("/proc/meminfo", "r") as fin:
+                for line in fin:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) / (1024.0 * 1024.0)
+        elif sys.platform == "darwin":
+            # Total memory, the available one is not reported directly
+            return int(subprocess.check_output(["sysctl", "-n", "hw.memsize"])) / 1024.0 ** 3
+        elif sys.platform == "win32":
+            import ctypes # Only used here
+            class _MemoryStatus(ctypes.Structure): # pylint: disable=too-few-public-methods
+                _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                            ("ullTotalPhys", ctypes.c_ulonglong),
+                            ("ullAvailPhys", ctypes.c_ulonglong),
+                            ("ullTotalPageFile", ctypes.c_ulonglong),
+                            ("ullAvailPageFile", ctypes.c_ulonglong),
+                            ("ullTotalVirtual", ctypes.c_ulonglong),
+                            ("ullAvailVirtual", ctypes.c_ulonglong),
+                            ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+            status = _MemoryStatus()
+            status.dwLength = ctypes.sizeof(_MemoryStatus)
+            ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+            return status.ullAvailPhys / 1024.0 ** 3
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        pass
+    return None
+
+def _memory_passes(libraries, cpu_count, memory):
+    """ Splits the libraries in b2 passes: first the libraries too heavy to be compiled by
+    cpu_count jobs within the memory, with fewer jobs, then the others. b2 also builds the
+    libraries a library links with, so the heavy pass includes the heavy ones needed by the
+    light libraries, and runs first so that they are up to date in the light pass.
+    Returns (libraries, jobs)."""
+    def _jobs(libnames):
+        cost = max(LIBRARY_COMPILE_MEMORY.get(libname, DEFAULT_COMPILE_MEMORY)
+                   for libname in libnames)
+        return max(1, min(cpu_count, int(memory / cost)))
+
+    def _heavy(libname):
+        return LIBRARY_COMPILE_MEMORY.get(libname, DEFAULT_COMPILE_MEMORY) * cpu_count > memory
+
+    needed = dependency_closure(libraries, LIBRARY_DEPS)
+    heavy = [libname for libname in LIB_LIST if libname in needed and _heavy(libname)]
+    light = [libname for libname in libraries if libname not in heavy]
+    return [(libnames, _jobs(libnames)) for libnames in [heavy, light] if libnames]
+
+class _FilePlacer(object):
+    """ Places files in the package, as copy on write clones (reflink) or hard links when the
+    file system allows it, as copies otherwise. A method failing once is not tried again."""
+    METHODS = {"auto": ["reflink", "hardlink", "copy"],
+               "reflink": ["reflink", "copy"],
+               "copy": ["copy"]}
+
+    def __init__(self, mode):
+        if mode not in self.METHODS:
+            raise RuntimeError("Invalid CONAN_BOOST_PACKAGE_MODE '%s', expected one of: %s" %
+                               (mode, ", ".join(sorted(self.METHODS))))
+        self._methods = list(self.METHODS[mode])
+        self._lock = threading.Lock()
+        self.stats = {"files": 0, "bytes": 0}
+        self.stats.update({method: 0 for method in self.METHODS["auto"]})
+
+    def place(self, src, dst):
+        src = os.path.realpath(src)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        _remove_if_exists(dst)
+        for method in list(self._methods):
+            try:
+                {"reflink": _reflink_file, "hardlink": os.link, "copy": shutil.copy2}[method](
+                    src, dst)
+            except OSError:
+                if method == "copy":
+                    raise
+                _remove_if_exists(dst)
+                with self._lock:
+                    if method in self._methods:
+                        self._methods.remove(method)
+                continue
+            with self._lock:
+                self.stats["files"] += 1
+                self.stats["bytes"] += os.path.getsize(dst)
+                self.stats[method] += 1
+            return
+
+def _library_module(name):
+    """ The module of a library file, e.g. serialization for libboost_wserialization-mt.a."""
+    match = re.match(r"(?:lib)?(?:boost_)?([a-z0-9_]+)", name)
+    libname = match.group(1) if match else name
+    for module in sorted(LIB_LIST, key=len, reverse=True):
+        if libname.startswith(module):
+            return module
+    return {"unit_test_framework": "test", "prg_exec_monitor": "test",
+            "wserialization": "serialization"}.get(libname, libname)
+
+def _link_name(file_name):
+    """ The name to link a library file with, None if not linkable (e.g. versioned so, dll)."""
+    for extension in [".dll.a", ".a", ".so", ".dylib"]:
+        if file_name.endswith(extension):
+            name = file_name[:-len(extension)]
+            return name[len("lib"):] if name.startswith("lib") else name
+    if file_name.endswith(".lib"):
+        return file_name[:-len(".lib")]
+    return None
+
+def _library_debug_files(build_folder, extension):
+    """ The files with the extension in the b2 build folder, by module (libs/<module>/...)."""
+    debug_files = {}
+    for root, _, files in os.walk(build_folder):
+        parts = os.path.relpath(root, build_folder).split(os.sep)
+        if "libs" not in parts[:-1]:
+            continue
+        module = parts[parts.index("libs") + 1]
+        debug_files.setdefault(module, []).extend(
+            sorted(os.path.join(root, name) for name in files if name.endswith(extension)))
+    return {module: files for module, files in debug_files.items() if files}
+
+def _reflink_file(src, dst):
+    """ Clones a file sharing its data blocks (btrfs, xfs), raises OSError if not supported."""
+    if not sys.platform.startswith("linux"):
+        raise OSError("reflink not supported on %s" % sys.platform)
+    import fcntl # Not available on Windows
+    ficlone = 0x40049409
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), ficlone, fsrc.fileno())
+    shutil.copystat(src, dst)
+
+def _header_closure(include_root, headers):
+    """ The headers (paths relative to include_root) reachable through includes from the given
+    headers. Any <boost/...> or "boost/..." path found in a header is followed, to cover the
+    headers named through macros, and the preprocessed/ folders next to reachable headers are
+    added as they are included through computed names."""
+    include_re = re.compile(r'^\s*#\s*include\s*"([^"]+)"', re.MULTILINE)
+    boost_path_re = re.compile(r'[<"](boost/[\w./+-]+)[>"]')
+    closure = set()
+    pending = list(headers)
+    while pending:
+        header = pending.pop()
+        if header in closure:
+            continue
+        closure.add(header)
+        header_folder = os.path.dirname(header)
+        with open(os.path.join(include_root, header), "r", encoding="latin-1") as fin:
+            content = fin.read()
+        candidates = [os.path.normpath(os.path.join(header_folder, included))
+                      for included in include_re.findall(content)]
+        candidates.extend(boost_path_re.findall(content))
+        preprocessed_folder = os.path.join(include_root, header_folder, "preprocessed")
+        if os.path.isdir(preprocessed_folder):
+            for root, _, files in os.walk(preprocessed_folder, followlinks=True):
+                candidates.extend(os.path.relpath(os.path.join(root, name), include_root)
+                                  for name in files)
+        for candidate in candidates:
+            candidate = candidate.replace(os.sep, "/")
+            if candidate not in closure and \
+               os.path.isfile(os.path.join(include_root, candidate)):
+                pending.append(candidate)
+    return closure
+
+def _defines_before_includes(source):
+    """ True if the source defines a macro before its first include, e.g. a feature test macro
+    which has no effect once another unit included the system headers."""
+    in_comment = False
+    with open(source, "r", encoding="latin-1") as fin:
+        for line in fin:
+            line = line.strip()
+            if in_comment:
+                in_comment = "*/" not in line
+                continue
+            if line.startswith("/*"):
+                in_comment = "*/" not in line
+            elif re.match(r"#\s*include\b", line):
+                return False
+            elif re.match(r"#\s*define\b", line):
+                return True
+    return False
+
+def _unity_batches(b2_output, batch_size, source_folder):
+    """ Groups the C++ compile actions of a b2 dry run (-n -d2) in batches of units of the same
+    library compiled with the same command. Returns (command, objects, sources) tuples, the
+    command having @OBJECT@ and @SOURCE@ placeholders. The paths of the sources are relative to
+    source_folder (the b2 working folder)."""
+    groups = {}
+    library = None
+    for line in b2_output.splitlines():
+        match = _B2ActionLog.ACTION_RE.match(line.rstrip())
+        if match:
+            library = None
+            # e.g. gcc.compile.c++, clang-linux.compile.c++.without-pth
+            if ".compile.c++" in match.group(1):
+                library_match = _B2ActionLog.LIBRARY_RE.search(match.group(2))
+                library = library_match.group(1) if library_match else None
+            continue
+        output_match = re.search(r'-o "([^"]+)"', line)
+        source_match = re.search(r'"([^"]+\.(?:cpp|cxx|cc))"\s*$', line)
+        if not library or not output_match or not source_match:
+            continue
+        obj, source = output_match.group(1), source_match.group(1)
+        unit = os.path.splitext(os.path.basename(source))[0]
+        if unit not in UNITY_EXCLUDED_UNITS["*"] + UNITY_EXCLUDED_UNITS.get(library, []) and \
+           not _defines_before_includes(os.path.join(source_folder, source)):
+            command = line.strip().replace('"%s"' % obj, '"@OBJECT@"')
+            command = command.replace('"%s"' % source, '"@SOURCE@"')
+            groups.setdefault((library, command, os.path.dirname(obj)), []).append(
+                (obj, source))
+        library = None
+
+    batches = []
+    for (_, command, _), units in sorted(groups.items()):
+        units.sort(key=lambda unit: unit[1])
+        for index in range(0, len(units), batch_size):
+            batch = units[index:index + batch_size]
+            if len(batch) > 1:
+                batches.append((command, [obj for obj, _ in batch],
+                                [source for _, source in batch]))
+    return batches
+
 class BoostConan(ConanFile):
     """ Conan recipe for Boost."""
     name = "boost"
@@ -33,6 +454,10 @@ class BoostConan(ConanFile):
     bzip2_md5 = "00b516f4704d4a7cb50a1d97e6e8e15b"
     zlib_version = "1.2.11"
     zlib_sha256 = "c3e5e9fdd5004dcb542feda5ee4f0ff0744628baf8ed2dd5d66f8ca1197cb1a1"
+    xz_version = "5.2.4"
+    xz_sha256 = "b512f3b726d3b37b6dc4c8570e137b9311e7552e8ccbab4d39d47ce5f4177145"
+    # The release archive, for source_mode=archive
+    boost_sha256 = "bd0df411efd9a585e5a2212275f8762079fed8842264954675a4fddc46cfcf60"
 
     # The current python option requires the package to be built locally, to find default Python
     # implementation
@@ -41,7 +466,54 @@ class BoostConan(ConanFile):
         "shared": [True, False],
         "header_only": [True, False],
         "fPIC": [True, False],
-        "layout" : ["versioned", "tagged", "system"]
+        "layout" : ["versioned", "tagged", "system"],
+        # Build the static/shared (link) or debug/release x static/shared (all) variants
+        # sharing the other settings and options in a single b2 run; each package then only
+        # stages its own variant from the shared intermediate files.
+        "multi_variant" : ["none", "link", "all"],
+        # full: the whole superproject with its history
+        # shallow: no history and only the submodules needed by the enabled libraries and by
+        #          the header_libraries (comma separated Boost module names or "all")
+        # archive: the release archive, through the download store
+        # Note: with the default header_libraries=all, shallow still initializes most of the
+        # submodules (all the header only modules and their dependencies); list the header
+        # libraries the consumers use to fetch only what the package needs.
+        "source_mode" : ["full", "shallow", "archive"],
+        "header_libraries" : "ANY",
+        # Wraps the compiler with a compiler cache, with a cache folder per settings
+        "compiler_cache" : ["none", "ccache", "sccache"],
+        # Comma separated compiled libraries needed by the consumer (or "all"); the libraries
+        # they link with are added and all the others are disabled (sets the without_* options)
+        "with_libraries" : "ANY",
+        # cpu: one b2 run with a job per core
+        # memory: the number of jobs is capped by the available memory, the libraries too heavy
+        #         to compile on all the cores are built in a separate, narrower, b2 run
+        "parallel_mode" : ["cpu", "memory"],
+        # Writes build_profile.json/csv with the timing of the b2 actions to the build folder
+        "build_profile" : [True, False],
+        # Compiles the units of each library in batches of unity_batch_size amalgamated units
+        # (not for Visual Studio)
+        "unity_build" : [True, False],
+        "unity_batch_size" : "ANY",
+        # Link time optimization
+        "lto" : [True, False],
+        # Profile guided optimization (gcc/clang): instrumented build, training with
+        # test_package/pgo_training.cpp, then the optimized build
+        "pgo" : [True, False],
+        # Packages only the headers reachable from the public headers of the enabled libraries
+        # and of the header_libraries
+        "prune_headers" : [True, False],
+        # Target instruction set: none (compiler default), an x86-64 level of MARCH_LEVELS, or
+        # a value passed as is to -march (gcc/clang) or /arch (Visual Studio), e.g. "haswell"
+        "march" : "ANY",
+        # Builds the iostreams lzma filter, with a static liblzma built from the xz sources or
+        # the one found in CONAN_BOOST_LZMA_ROOT (include and lib folders, needed with Visual
+        # Studio)
+        "with_lzma" : [True, False],
+        # Compiles with function/data sections, garbage collected by the shared libraries link,
+        # and moves the debug info of the Debug builds to the debug folder of the package (split
+        # DWARF .dwo/.dwp, dSYM or PDB), out of the libraries the consumers link
+        "lean_link" : [True, False]
     }
     options.update({"without_%s" % libname: [True, False] for libname in LIB_LIST})
 
@@ -50,13 +522,29 @@ class BoostConan(ConanFile):
         "cppstd=17",
         "header_only=False",
         "fPIC=True",
-        "layout=system"]
+        "layout=system",
+        "multi_variant=none",
+        "source_mode=full",
+        "header_libraries=all",
+        "compiler_cache=none",
+        "with_libraries=all",
+        "build_profile=False",
+        "parallel_mode=cpu",
+        "unity_build=False",
+        "unity_batch_size=8",
+        "lto=False",
+        "pgo=False",
+        "prune_headers=False",
+        "march=none",
+        "with_lzma=False",
+        "lean_link=False"]
     default_options.extend(["without_%s=False" % libname for libname in LIB_LIST])
     default_options = tuple(default_options)
 
     license = "Boost Software License - Version 1.0. http://www.boost.org/LICENSE_1_0.txt"
     short_paths = True
     no_copy_source = True
+    exports = ["boost_deps.py", "test_package/pgo_training.cpp"]
 
     def config_options(self):
         if self.settings.compiler == "Visual Studio":
@@ -67,6 +555,19 @@ class BoostConan(ConanFile):
             self.options.remove("shared")
             self.options.remove("fPIC")
             self.options.remove("layout")
+            self.options.remove("multi_variant")
+            self.options.remove("compiler_cache")
+            self.options.remove("build_profile")
+            self.options.remove("parallel_mode")
+            self.options.remove("unity_build")
+            self.options.remove("unity_batch_size")
+            self.options.remove("lto")
+            self.options.remove("pgo")
+            self.options.remove("march")
+            self.options.remove("with_lzma")
+            self.options.remove("lean_link")
+
+        self._configure_libraries()
 
         if self.settings.compiler == "Visual Studio" and \
            self.options.shared and "MT" in str(self.settings.compiler.runtime):
@@ -98,37 +599,186 @@ class BoostConan(ConanFile):
                 self.output.warn('Forcing compiler.libcxx to be "libstdc++11"')
                 self.settings.compiler.libcxx = "libstdc++11"
 
+        if self.settings.compiler == "Visual Studio" and \
+           not self.options.header_only and self.options.compiler_cache == "ccache":
+            self.output.warn("ccache does not support Visual Studio, using sccache")
+            self.options.compiler_cache = "sccache"
+
+        if not self.options.header_only and self.options.unity_build:
+            if self.settings.compiler == "Visual Studio":
+                # The b2 msvc actions compile through response files, not replayable here
+                self.output.warn("Unity build not supported with Visual Studio, disabling it")
+                self.options.unity_build = False
+            elif not str(self.options.unity_batch_size).isdigit() or \
+                 int(str(self.options.unity_batch_size)) < 2:
+                raise RuntimeError("unity_batch_size should be a number greater than 1")
+        if not self.options.header_only and not self.options.unity_build:
+            self.options.unity_batch_size = "8"
+
+        if not self.options.header_only and self.options.pgo:
+            if self.settings.compiler == "Visual Studio":
+                self.output.warn("PGO not supported with Visual Studio, disabling it")
+                self.options.pgo = False
+            elif self.options.multi_variant != "none":
+                # The variants cannot share the objects of the instrumented build
+                self.output.warn("PGO builds each variant on its own, disabling multi_variant")
+                self.options.multi_variant = "none"
+
+        if not self.options.header_only and self.options.lean_link and \
+           self.options.multi_variant != "none":
+            # The debug info is collected from the objects of this variant only
+            self.output.warn("lean_link builds each variant on its own, disabling multi_variant")
+            self.options.multi_variant = "none"
+
+        if not self.options.header_only and str(self.options.march) in MARCH_LEVELS and \
+           self.settings.arch != "x86_64":
+            raise RuntimeError("march=%s needs arch=x86_64" % self.options.march)
+
+        if not self.options.header_only and self.options.without_iostreams:
+            self.options.with_lzma = False
+
+        unknown_modules = [name for name in self._header_libraries() if name not in BOOST_DEPS]
+        if unknown_modules:
+            raise RuntimeError("Unknown header_libraries: %s" % ", ".join(unknown_modules))
+
+    def _configure_libraries(self):
+        """ Sets the without_* options from with_libraries and checks the enabled libraries
+        have the libraries they link with."""
+        if self.options.with_libraries != "all":
+            names = [name.strip() for name in str(self.options.with_libraries).split(",")
+                     if name.strip()]
+            unknown_libraries = [name for name in names if name not in LIB_LIST]
+            if unknown_libraries:
+                raise RuntimeError("Unknown with_libraries: %s" % ", ".join(unknown_libraries))
+            selected = dependency_closure(names, LIBRARY_DEPS)
+            self.output.info("Building libraries: %s" %
+                             ", ".join(libname for libname in LIB_LIST if libname in selected))
+            for libname in LIB_LIST:
+                setattr(self.options, "without_%s" % libname, libname not in selected)
+            return
+
+        for libname in LIB_LIST:
+            if not getattr(self.options, "without_%s" % libname):
+                missing = [dependency for dependency in LIBRARY_DEPS.get(libname, [])
+                           if getattr(self.options, "without_%s" % dependency)]
+                if missing:
+                    self.output.warn("%s needs the disabled libraries: %s" %
+                                     (libname, ", ".join(missing)))
+
     def package_id(self):
-        if self.options.header_only:
+        # A shallow source only holds the headers of the selected modules
+        shallow_headers = self.options.source_mode == "shallow" and \
+            (self.options.header_libraries != "all" or
+             any(getattr(self.options, "without_%s" % libname) for libname in LIB_LIST))
+        partial_headers = self.options.prune_headers or shallow_headers
+        if self.options.header_only and not partial_headers:
             self.info.header_only()
+        elif self.options.header_only:
+            # The header_libraries and without_* options select the packaged headers
+            self.info.settings.clear()
+            del self.info.options.cppstd
+            del self.info.options.with_libraries
+        else:
+            # How the variants are scheduled, cached and profiled does not change the binaries
+            del self.info.options.multi_variant
+            del self.info.options.compiler_cache
+            del self.info.options.build_profile
+            del self.info.options.parallel_mode
+            # The selected libraries are given by the without_* options
+            del self.info.options.with_libraries
+            if not partial_headers:
+                del self.info.options.header_libraries
+        if not self.options.header_only or partial_headers:
+            # The sources are the same, whatever the way they are fetched, unless the shallow
+            # source gives a partial header tree (not pruned)
+            if not shallow_headers or self.options.prune_headers:
+                del self.info.options.source_mode
 
     def source(self):
         self.output.info("Downloading boost...")
-        if not os.path.isdir("boost"):
+        if self.options.source_mode == "archive":
+            if not os.path.isdir("boost"):
+                boost_zip_name = "boost_%s.tar.gz" % self.version.replace(".", "_")
+                tools.unzip(self._get_archive(
+                    "https://archives.boost.io/release/%s/source/%s" % (self.version,
+                                                                       boost_zip_name),
+                    boost_zip_name, "sha256", self.boost_sha256))
+                os.rename(boost_zip_name[:-len(".tar.gz")], "boost")
+        elif self.options.source_mode == "shallow":
+            if not os.path.isdir("boost"):
+                self._check_online("the boost repository")
+                self.run('git clone -b boost-%s --depth 1 \
+                --single-branch %s' % (self.version, BOOST_GIT))
+            self._update_submodules(os.path.abspath("boost"))
+        elif not os.path.isdir("boost"):
+            self._check_online("the boost repository")
             self.run('git clone -b boost-%s --recursive \
             --single-branch %s' % (self.version, BOOST_GIT))
-        else:
+        elif not self._offline():
             self.run("cd boost && git pull")
 
         if not self.options.without_iostreams:
             # bzip2
             self.output.info("Downloading bzip2...")
             bzip2_zip_name = "bzip2-%s.tar.gz" % self.bzip2_version
-            if not os.path.isfile(bzip2_zip_name):
-                tools.download("http://www.bzip.org/%s/%s" %
-                               (self.bzip2_version, bzip2_zip_name), bzip2_zip_name)
-            tools.check_md5(bzip2_zip_name, self.bzip2_md5)
-            tools.unzip(bzip2_zip_name)
+            if not os.path.isdir("bzip2-%s" % self.bzip2_version):
+                tools.unzip(self._get_archive(
+                    "http://www.bzip.org/%s/%s" % (self.bzip2_version, bzip2_zip_name),
+                    bzip2_zip_name, "md5", self.bzip2_md5))
 
             # zlib
             self.output.info("Downloading zlib...")
             zlib_zip_name = "zlib-%s.tar.gz" % self.zlib_version
-            if not os.path.isfile(zlib_zip_name):
-                tools.download("http://downloads.sourceforge.net/project/libpng/zlib/%s/%s" %
-                               (self.zlib_version, zlib_zip_name), zlib_zip_name)
-            tools.check_sha256(zlib_zip_name, self.zlib_sha256)
-            tools.unzip(zlib_zip_name)
+            if not os.path.isdir("zlib-%s" % self.zlib_version):
+                tools.unzip(self._get_archive(
+                    "http://downloads.sourceforge.net/project/libpng/zlib/%s/%s" %
+                    (self.zlib_version, zlib_zip_name),
+                    zlib_zip_name, "sha256", self.zlib_sha256))
+
+            # xz (liblzma)
+            if not self.options.header_only and self.options.with_lzma and \
+               not tools.get_env("CONAN_BOOST_LZMA_ROOT"):
+                self._get_xz_sources(os.path.abspath("."))
+
+    def _get_xz_sources(self, abs_source_folder):
+        """ Unpacks the xz sources in the source folder, if missing."""
+        xz_folder = os.path.join(abs_source_folder, "xz-%s" % self.xz_version)
+        # The source folder is shared, several builds may need the sources at the same time
+        with fasteners.InterProcessLock(os.path.join(abs_source_folder, ".conan_xz.lock")):
+            if not os.path.isdir(xz_folder):
+                self.output.info("Downloading xz...")
+                xz_zip_name = "xz-%s.tar.gz" % self.xz_version
+                tools.unzip(self._get_archive(
+                    "https://downloads.sourceforge.net/project/lzmautils/%s" % xz_zip_name,
+                    xz_zip_name, "sha256", self.xz_sha256), abs_source_folder)
+        return xz_folder
 
+    def _offline(self):
+        return tools.get_env("CONAN_BOOST_OFFLINE", False)
+
+    def _check_online(self, what):
+        if self._offline():
+            raise RuntimeError("Cannot fetch %s: CONAN_BOOST_OFFLINE is set" % what)
+
+    def _get_archive(self, url, file_name, hash_name, hash_value):
+        """ Path of an archive in the download store, downloading it on a store miss.
+        The archives are verified once, when added to the store."""
+        store_folder = _cache_folder("downloads", "%s-%s" % (hash_name, hash_value))
+        archive = os.path.join(store_folder, file_name)
+        if os.path.isfile(archive):
+            self.output.info("Using stored %s" % archive)
+            return archive
+
+        self._check_online(file_name)
+        tmp_archive = "%s.%s.tmp" % (archive, os.getpid())
+        try:
+            tools.download(url, tmp_archive)
+            {"md5": tools.check_md5, "sha256": tools.check_sha256}[hash_name](tmp_archive,
+                                                                             hash_value)
+            os.replace(tmp_archive, archive)
+        finally:
+            _remove_if_exists(tmp_archive)
+        return archive
 
     def build(self):
         if self.options.header_only:
@@ -139,28 +789,445 @@ class BoostConan(ConanFile):
         abs_source_folder = os.path.abspath(self.source_folder)
         abs_build_folder = os.path.abspath(".")
 
+        # The source folder is shared by packages with different options, it may miss submodules
+        # needed by this one.
+        self._update_submodules(os.path.join(abs_source_folder, "boost"))
+
         # Note: bootstrap and b2 headers change the source folder which may be shared between
         # build variants.
-        # This should be safe as bootstrap builds from scratch each time and the result of
-        # b2 headers is usable across build variants.
-        self._bootstrap(abs_source_folder)
+        # This should be safe as b2 is run from the engine cache and b2 headers runs under a
+        # lock, only once per source revision, its result being usable across build variants.
+        self._b2_exe = self._bootstrap(abs_source_folder)
         self._b2_headers(abs_source_folder)
 
-        args = self._get_build_args(abs_source_folder, abs_build_folder)
-        b2_args = " ".join(args)
+        if self.options.with_lzma:
+            self._build_lzma(abs_source_folder, abs_build_folder)
+
+        self._action_log = _B2ActionLog(self.output) if self.options.build_profile else None
+        user_config = self._write_user_config(abs_build_folder)
+        with self._compiler_cache(abs_source_folder):
+            if self.options.pgo:
+                self._train_pgo(abs_source_folder, abs_build_folder, user_config)
+
+            if self.options.multi_variant != "none":
+                self._build_multi_variant(abs_source_folder, os.path.join(abs_build_folder,
+                                                                          "stage"), user_config)
+            else:
+                self._build_libraries(abs_source_folder, abs_build_folder,
+                                      os.path.join(abs_build_folder, "stage"),
+                                      user_config=user_config,
+                                      pgo_phase="use" if self.options.pgo else None)
+
+        if self.options.lean_link:
+            self._split_debug_info(abs_build_folder)
+
+        if self._action_log:
+            self._write_build_profile(abs_build_folder)
+
+    def _lzma_root(self, abs_build_folder):
+        """ The folder with the include and lib folders of liblzma."""
+        return tools.get_env("CONAN_BOOST_LZMA_ROOT", os.path.join(abs_build_folder, "lzma"))
+
+    def _build_lzma(self, abs_source_folder, abs_build_folder):
+        """ Builds a static, position independent, liblzma from the xz sources, unless
+        CONAN_BOOST_LZMA_ROOT is set."""
+        if tools.get_env("CONAN_BOOST_LZMA_ROOT"):
+            return
+        if self.settings.compiler == "Visual Studio":
+            raise RuntimeError("with_lzma needs CONAN_BOOST_LZMA_ROOT with Visual Studio")
+        lzma_root = self._lzma_root(abs_build_folder)
+        if os.path.isfile(os.path.join(lzma_root, "lib", "liblzma.a")):
+            return
+        # The source folder is shared with packages which may not have needed xz
+        xz_folder = self._get_xz_sources(abs_source_folder)
+
+        compiler = {"gcc": "gcc", "clang": "clang",
+                    "apple-clang": "clang"}[str(self.settings.compiler)]
+        cflags = ["-O2", "-fPIC"]
+        if self.settings.arch in ["x86", "x86_64"]:
+            cflags.append("-m32" if self.settings.arch == "x86" else "-m64")
+        # Out of tree: the source folder is shared by the builds
+        lzma_build_folder = os.path.join(abs_build_folder, "lzma-build")
+        shutil.rmtree(lzma_build_folder, ignore_errors=True)
+        os.makedirs(lzma_build_folder)
+        self.run('cd "%s" && "%s" --prefix="%s" --disable-shared --enable-static --with-pic '
+                 "--disable-xz --disable-xzdec --disable-lzmadec --disable-lzmainfo "
+                 '--disable-lzma-links --disable-scripts --disable-doc CC="%s" CFLAGS="%s" && '
+                 "make -j%s install" %
+                 (lzma_build_folder,
+                  os.path.join(xz_folder, "configure"),
+                  lzma_root, tools.get_env("CC", compiler), " ".join(cflags), tools.cpu_count()))
+
+    def _train_pgo(self, abs_source_folder, abs_build_folder, user_config):
+        """ Builds the instrumented libraries and runs the training workload with them, to
+        collect the profiles used by the final build."""
+        profile_folder = self._pgo_profile_folder()
+        if os.path.isdir(profile_folder):
+            shutil.rmtree(profile_folder)
+        os.makedirs(profile_folder)
+        abs_stage_folder = os.path.join(abs_build_folder, "pgo-stage")
+        self._build_libraries(abs_source_folder, abs_build_folder, abs_stage_folder,
+                              user_config=user_config, pgo_phase="generate")
+
+        training_exe = self._build_pgo_training(abs_source_folder, abs_build_folder,
+                                                os.path.join(abs_stage_folder, "lib"))
+        self.output.info("Running the PGO training")
+        abs_lib_folder = os.path.join(abs_stage_folder, "lib")
+        # PATH: the DLLs of the MinGW shared builds
+        with tools.environment_append({"LD_LIBRARY_PATH": abs_lib_folder,
+                                       "DYLD_LIBRARY_PATH": abs_lib_folder,
+                                       "PATH": [abs_lib_folder]}):
+            self.run('"%s" "%s"' % (training_exe,
+                                    os.path.join(abs_build_folder, "pgo-training-work")))
+
+        if "clang" in str(self.settings.compiler):
+            llvm_profdata = "xcrun llvm-profdata" if self.settings.compiler == "apple-clang" \
+                else tools.get_env("LLVM_PROFDATA", "llvm-profdata")
+            # Neither the quoted command line nor llvm-profdata expand the pattern
+            profiles = sorted(glob.glob(os.path.join(profile_folder, "*.profraw")))
+            self.run('%s merge -output="%s" %s' % (
+                llvm_profdata, os.path.join(profile_folder, "default.profdata"),
+                " ".join('"%s"' % profile for profile in profiles)))
+
+        # The optimized build compiles again to the same object paths, as the profiles are
+        # looked up by object path.
+        shutil.rmtree(os.path.join(abs_build_folder, "tmp"))
+
+    def _build_pgo_training(self, abs_source_folder, abs_build_folder, abs_lib_folder):
+        """ Builds the training workload against the instrumented libraries."""
+        training_source = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                       "test_package", "pgo_training.cpp")
+        training_exe = os.path.join(abs_build_folder, "pgo_training")
+        cppflags, cflags, linkflags, defines = self._get_build_flags_defines(
+            pgo_phase="generate")
+        cppflags += cflags
+        defines.append("BOOST_ALL_NO_LIB")
+        if self.options.shared:
+            defines.append("BOOST_ALL_DYN_LINK")
+
+        # In link order
+        libnames = []
+        if not self.options.without_iostreams:
+            defines.append("WITH_IOSTREAMS")
+            libnames.extend(["iostreams", "bzip2", "zlib"])
+        if not self.options.without_regex:
+            defines.append("WITH_REGEX")
+            libnames.append("regex")
+        if not self.options.without_filesystem:
+            defines.append("WITH_FILESYSTEM")
+            libnames.extend(["filesystem", "system"])
+        lib_extensions = (".so", ".dylib", ".dll.a") if self.options.shared else (".a",)
+        libs = []
+        for libname in libnames:
+            libs.extend(os.path.join(abs_lib_folder, file_name)
+                        for file_name in sorted(os.listdir(abs_lib_folder))
+                        if re.match(r"^(lib)?boost_%s(-|\.)" % libname, file_name) and
+                        file_name.endswith(lib_extensions))
+
+        command = '%s %s %s -I"%s" "%s" -o "%s" %s %s' % (
+            self._toolset_compiler()[1], " ".join(cppflags),
+            " ".join("-D%s" % define for define in defines),
+            os.path.join(abs_source_folder, "boost"), training_source, training_exe,
+            " ".join('"%s"' % lib for lib in libs), " ".join(linkflags))
+        if self.options.shared and self.settings.os != "Windows":
+            command += ' -Wl,-rpath,"%s"' % abs_lib_folder
+        if self.settings.os == "Linux":
+            command += " -pthread"
+        self.output.info("Building the PGO training: %s" % command)
+        self.run(command)
+        return training_exe
+
+    def _pgo_profile_folder(self):
+        return os.path.join(os.path.abspath(self.build_folder), "pgo")
+
+    def _build_multi_variant(self, abs_source_folder, abs_stage_folder, user_config):
+        """ Builds in a single b2 run all the variants sharing this configuration, then stages
+        the libraries of this variant from the shared intermediate files."""
+        if self.options.multi_variant == "all":
+            variants = ["debug", "release"]
+        else:
+            variants = [str(self.settings.build_type).lower()]
+        if self.settings.compiler == "Visual Studio" and \
+           "MT" in str(self.settings.compiler.runtime):
+            links = ["static"]
+        else:
+            links = ["static", "shared"]
+
+        shared_build_folder = os.path.join(abs_source_folder, "multi_variant",
+                                           self._multi_variant_key())
+        if not os.path.isdir(shared_build_folder):
+            os.makedirs(shared_build_folder, exist_ok=True)
+        stamp_file = os.path.join(shared_build_folder, "build.stamp")
+
+        # Variants may be built concurrently, the first one to get the lock builds all of them.
+        with fasteners.InterProcessLock(os.path.join(shared_build_folder, "build.lock")):
+            if os.path.isfile(stamp_file):
+                self.output.info("Reusing multi-variant build: %s" % shared_build_folder)
+            else:
+                # The tagged layout keeps the libraries of the different variants apart in the
+                # shared stage folder.
+                self._build_libraries(abs_source_folder, shared_build_folder,
+                                      os.path.join(shared_build_folder, "stage"),
+                                      variants=variants, links=links, layout="tagged",
+                                      user_config=user_config)
+                with open(stamp_file, "w") as fout:
+                    fout.write("variant=%s link=%s\n" % (",".join(variants), ",".join(links)))
 
+            # Staging reuses the objects and only archives/links the libraries with the
+            # requested layout; still under the lock as b2 updates the shared build folder.
+            self._build_libraries(abs_source_folder, shared_build_folder, abs_stage_folder,
+                                  user_config=user_config)
+
+    def _multi_variant_key(self):
+        """ The settings and options shared by the variants of a multi-variant build."""
+        ignored = ["shared", "multi_variant"]
+        values = self.settings.values.as_list() + self.options.values.as_list()
+        if self.options.multi_variant == "all":
+            ignored.append("build_type")
+            # The Debug packages use the debug runtime (MDd/MTd) of their Release peers (MD/MT)
+            values = [(name, str(value).rstrip("d") if name == "compiler.runtime" else value)
+                      for name, value in values]
+        values = ["%s=%s" % (name, value) for name, value in values if name not in ignored]
+        return hashlib.sha1("\n".join(values).encode()).hexdigest()[:16]
+
+    def _build_libraries(self, abs_source_folder, abs_build_folder, abs_stage_folder,
+                         **build_args):
+        """ Builds and stages the libraries, in one or more b2 runs (see parallel_mode)."""
+        memory = _available_memory() if self.options.parallel_mode == "memory" else None
+        if memory is None:
+            if self.options.parallel_mode == "memory":
+                self.output.warn("Unknown available memory, using a job per core")
+            args = self._get_build_args(abs_source_folder, abs_build_folder, **build_args)
+            self._run_b2(abs_source_folder, abs_stage_folder, args)
+            return
+
+        passes = _memory_passes(self._enabled_libraries(abs_source_folder), tools.cpu_count(),
+                                memory)
+        for libraries, jobs in passes:
+            self.output.info("Building with %s jobs (%.1f GB available): %s" %
+                             (jobs, memory, ", ".join(libraries)))
+            args = self._get_build_args(abs_source_folder, abs_build_folder,
+                                        libraries=libraries, jobs=jobs, **build_args)
+            self._run_b2(abs_source_folder, abs_stage_folder, args)
+
+    def _run_b2(self, abs_source_folder, abs_stage_folder, args):
         # Note: See https://github.com/boostorg/build/issues/257
         # in case build fails after a MSVC upgrade.
-        command_start = "cd %s && " % (os.path.join(abs_source_folder, "boost"))
-        command_start += ".\\b2 " if self.settings.os == "Windows" else "./b2 "
-        command_start += " --stagedir=%s " % os.path.join(abs_build_folder, "stage")
-        command = command_start + b2_args
+        command = "cd %s && " % (os.path.join(abs_source_folder, "boost"))
+        # b2 finds the build system from the boost-build.jam of the working folder
+        command += '"%s" ' % self._b2_exe
+        command += " --stagedir=%s " % abs_stage_folder
+        command += " ".join(args)
 
         if self.settings.os == "Windows" and self.settings.compiler == "Visual Studio":
             command = "%s && %s" % (tools.vcvars_command(self.settings), command)
 
+        jobs = [int(arg.strip()[2:]) for arg in args if arg.strip().startswith("-j")]
+        jobs = jobs[-1] if jobs else 1
+        if self.options.unity_build:
+            self._build_unity_objects(abs_source_folder, command, jobs)
+
         self.output.info("Running: %s" % command)
-        self.run(command)
+        if self._action_log:
+            self._action_log.begin_run(jobs)
+            self.run(command, output=self._action_log)
+        else:
+            self.run(command)
+
+    def _build_unity_objects(self, abs_source_folder, command, jobs):
+        """ Compiles the out of date units of a b2 command in amalgamated batches.
+        The object of a batch takes the place of the object of its first unit, the other
+        units get empty objects, so the b2 run finds all these objects up to date and only
+        archives/links them, with the usual library names."""
+        boost_source_folder = os.path.join(abs_source_folder, "boost")
+
+        def _dry_run():
+            dry_run = subprocess.run(command + " -n", shell=True, stdout=subprocess.PIPE,
+                                     stderr=subprocess.STDOUT, universal_newlines=True)
+            if dry_run.returncode != 0:
+                raise RuntimeError("b2 dry run failed:\n%s" % dry_run.stdout)
+            return dry_run.stdout
+
+        # The batches of the previous runs in this build folder, by object: a batch object
+        # holds all the units of its batch, which are rebuilt together when one is out of date
+        batches_file = os.path.join(re.search(r"--build-dir=(\S+)", command).group(1),
+                                    "unity_batches.json")
+        recorded = {}
+        if os.path.isfile(batches_file):
+            with open(batches_file, "r") as fin:
+                recorded = json.load(fin)
+        dry_run_output = _dry_run()
+        stale = set(obj for out_of_date in re.findall(r'-o "([^"]+)"', dry_run_output)
+                    for obj in recorded.get(out_of_date, []))
+        if stale:
+            self.output.info("Unity build: rebuilding %s units of out of date batches" %
+                             len(stale))
+            for obj in stale:
+                _remove_if_exists(os.path.join(boost_source_folder, obj))
+            dry_run_output = _dry_run()
+
+        batches = _unity_batches(dry_run_output, int(str(self.options.unity_batch_size)),
+                                 boost_source_folder)
+        for out_of_date in re.findall(r'-o "([^"]+)"', dry_run_output):
+            recorded.pop(out_of_date, None)
+        for _, objects, _ in batches:
+            recorded.update((obj, objects) for obj in objects)
+        os.makedirs(os.path.dirname(batches_file), exist_ok=True)
+        with open(batches_file, "w") as fout:
+            json.dump(recorded, fout)
+        if not batches:
+            return
+        self.output.info("Unity build: %s units in %s batches" %
+                         (sum(len(objects) for _, objects, _ in batches), len(batches)))
+
+        def _compile(batch_index, batch):
+            batch_command, objects, sources = batch
+            objects = [os.path.join(boost_source_folder, obj) for obj in objects]
+            object_folder = os.path.dirname(objects[0])
+            os.makedirs(object_folder, exist_ok=True)
+            unity_source = os.path.join(object_folder, "unity_%s.cpp" % batch_index)
+            empty_source = os.path.join(object_folder, "unity_%s_empty.cpp" % batch_index)
+            with open(unity_source, "w") as fout:
+                for source in sources:
+                    fout.write('#include "%s"\n' % os.path.join(boost_source_folder, source)
+                               .replace("\\", "/"))
+            with open(empty_source, "w") as fout:
+                fout.write("\n")
+            empty_object = empty_source[:-len(".cpp")] + os.path.splitext(objects[0])[1]
+            for source, obj in [(unity_source, objects[0]), (empty_source, empty_object)]:
+                compile_command = batch_command.replace("@OBJECT@", obj)
+                compile_command = compile_command.replace("@SOURCE@", source)
+                result = subprocess.run(compile_command, shell=True, cwd=boost_source_folder,
+                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                        universal_newlines=True)
+                if result.returncode != 0:
+                    raise RuntimeError("Unity compile failed:\n%s\n%s" %
+                                       (compile_command, result.stdout))
+            for obj in objects[1:]:
+                shutil.copyfile(empty_object, obj)
+
+        with ThreadPoolExecutor(jobs) as executor:
+            for result in [executor.submit(_compile, index, batch)
+                           for index, batch in enumerate(batches)]:
+                result.result()
+
+    def _split_debug_info(self, abs_build_folder):
+        """ Moves the debug info of the staged libraries to stage/debug and reports the size of
+        each library with and without it."""
+        stage_lib_folder = os.path.join(abs_build_folder, "stage", "lib")
+        debug_folder = os.path.join(abs_build_folder, "stage", "debug")
+        shutil.rmtree(debug_folder, ignore_errors=True)
+        os.makedirs(debug_folder)
+
+        if self.settings.build_type == "Debug":
+            if self.settings.compiler == "Visual Studio":
+                # The compiler PDBs of the objects (static) and the linker PDBs (shared)
+                debug_files = _library_debug_files(os.path.join(abs_build_folder, "tmp"), ".pdb")
+                for files in debug_files.values():
+                    for path in files:
+                        shutil.copy2(path, os.path.join(debug_folder, os.path.basename(path)))
+            elif self.settings.os == "Macos":
+                # The static libraries keep their debug info, the debugger reads it from the
+                # objects when no dSYM is found
+                for name in os.listdir(stage_lib_folder):
+                    path = os.path.join(stage_lib_folder, name)
+                    if name.endswith(".dylib") and not os.path.islink(path):
+                        self.run('dsymutil "%s" -o "%s"' %
+                                 (path, os.path.join(debug_folder, name + ".dSYM")))
+                        self.run('strip -S "%s"' % path)
+            else:
+                # The skeleton debug info stays in the libraries, one DWARF package per module
+                dwp = shutil.which("dwp") or shutil.which("llvm-dwp")
+                debug_files = _library_debug_files(os.path.join(abs_build_folder, "tmp"), ".dwo")
+                for module, files in debug_files.items():
+                    if dwp:
+                        self.run('"%s" -o "%s" %s' %
+                                 (dwp, os.path.join(debug_folder, "boost_%s.dwp" % module),
+                                  " ".join('"%s"' % path for path in files)))
+                    else:
+                        module_folder = os.path.join(debug_folder, module)
+                        os.makedirs(module_folder)
+                        for path in files:
+                            shutil.copy2(path, os.path.join(module_folder,
+                                                            os.path.basename(path)))
+
+        # Measured once the debug info is split, the macOS libraries being stripped
+        library_sizes = {}
+        for name in os.listdir(stage_lib_folder):
+            path = os.path.join(stage_lib_folder, name)
+            if not os.path.islink(path):
+                library_sizes[_library_module(name)] = \
+                    library_sizes.get(_library_module(name), 0) + os.path.getsize(path)
+        debug_sizes = {}
+        for root, _, files in os.walk(debug_folder):
+            for name in files:
+                module = os.path.relpath(os.path.join(root, name), debug_folder).split(os.sep)[0]
+                module = _library_module(module)
+                debug_sizes[module] = debug_sizes.get(module, 0) + \
+                    os.path.getsize(os.path.join(root, name))
+
+        self.output.info("Library sizes (MB), with the debug info / without:")
+        for module in sorted(set(library_sizes) | set(debug_sizes)):
+            size = library_sizes.get(module, 0)
+            self.output.info("  %-24s %10.2f %10.2f" %
+                             (module, (size + debug_sizes.get(module, 0)) / 1e6, size / 1e6))
+
+    def _write_build_profile(self, abs_build_folder):
+        actions = self._action_log.actions()
+        profile = _build_profile(actions)
+        with open(os.path.join(abs_build_folder, "build_profile.json"), "w") as fout:
+            json.dump(profile, fout, indent=2)
+        with open(os.path.join(abs_build_folder, "build_profile.csv"), "w", newline="") as fout:
+            fields = ["run", "rule", "library", "unit", "start", "end", "duration", "target"]
+            writer = csv.DictWriter(fout, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(actions)
+
+        if profile:
+            self.output.info("Build profile: %s actions, %.1fs wall, average parallelism %.2f" %
+                             (len(actions), profile["wall_time"],
+                              profile["average_parallelism"]))
+            for unit in profile["slowest_units"][:10]:
+                self.output.info("  %8.1fs %s/%s" % (unit["duration"], unit["library"],
+                                                    unit["unit"]))
+            self.output.info("Build profile written to: %s" %
+                             os.path.join(abs_build_folder, "build_profile.json"))
+
+    def _header_libraries(self):
+        if self.options.header_libraries == "all":
+            return [module for module in BOOST_DEPS if module not in LIB_LIST]
+        return [name.strip() for name in str(self.options.header_libraries).split(",")
+                if name.strip()]
+
+    def _required_submodules(self, boost_source_folder):
+        """ The paths of the submodules needed by this package."""
+        if self.options.source_mode == "full":
+            output = subprocess.check_output(
+                ["git", "config", "-f", ".gitmodules", "--get-regexp", r"submodule\..*\.path"],
+                cwd=boost_source_folder, universal_newlines=True)
+            return [line.split()[1] for line in output.splitlines()]
+
+        modules = BUILD_MODULES + self._header_libraries()
+        modules += [libname for libname in LIB_LIST
+                    if not getattr(self.options, "without_%s" % libname)]
+        return ["tools/build"] + sorted(module_path(module)
+                                        for module in dependency_closure(modules))
+
+    def _update_submodules(self, boost_source_folder):
+        """ Initializes the needed submodules which are not checked out yet."""
+        if self.options.source_mode == "archive":
+            return
+        with fasteners.InterProcessLock(os.path.join(boost_source_folder,
+                                                     ".conan_submodules.lock")):
+            missing = [path for path in self._required_submodules(boost_source_folder)
+                       if not os.path.exists(os.path.join(boost_source_folder, path, ".git"))]
+            if not missing:
+                return
+            self._check_online("the boost submodules")
+            self.output.info("Initializing %s submodules" % len(missing))
+            command = "cd %s && git submodule update --init " % boost_source_folder
+            command += "--depth 1 " if self.options.source_mode == "shallow" else "--recursive "
+            self.run(command + " ".join(missing))
 
     def _check_build_settings(self):
         if self.settings.compiler == "gcc" and\
@@ -171,12 +1238,38 @@ class BoostConan(ConanFile):
             raise RuntimeError("Unexpected compiler version")
 
     def _bootstrap(self, abs_source_folder):
+        """ Returns the path of b2 in the engine cache, building it if not found there.
+        b2 is run from the cache: a b2 in the shared source folder would be replaced by the
+        builds with other cache keys, while other builds may be running it."""
         with_toolset = {"apple-clang": "darwin"}.get(str(self.settings.compiler),
                                                      str(self.settings.compiler))
 
         boost_source_folder = os.path.join(abs_source_folder, "boost")
         tools_build_folder = os.path.join(boost_source_folder, "tools", "build")
+        b2_exe = "b2.exe" if self.settings.os == "Windows" else "b2"
+
+        # The engine binary depends only on the toolset used to build it and on its sources
+        engine_hash = _hash_folder(os.path.join(tools_build_folder, "src", "engine"),
+                                   skip_prefixes=["bin.", "bootstrap"])
+        engine_key = "%s-%s-%s-%s-%s" % (self.settings.os, with_toolset,
+                                         self.settings.compiler.version, self.settings.arch,
+                                         engine_hash[:16])
+        engine_cache_folder = _cache_folder("b2", engine_key)
+        cached_b2 = os.path.join(engine_cache_folder, b2_exe)
+
+        # One bootstrap per cache key; builds with other keys may share the source folder, where
+        # the bootstrap runs are serialized by a second lock (always taken after the first one)
+        with fasteners.InterProcessLock(os.path.join(engine_cache_folder, "bootstrap.lock")):
+            if os.path.isfile(cached_b2):
+                self.output.info("Using cached b2: %s" % cached_b2)
+            else:
+                with fasteners.InterProcessLock(os.path.join(boost_source_folder,
+                                                             ".conan_bootstrap.lock")):
+                    self._run_bootstrap(tools_build_folder, with_toolset)
+                    _install_file(os.path.join(tools_build_folder, b2_exe), cached_b2)
+        return cached_b2
 
+    def _run_bootstrap(self, tools_build_folder, with_toolset):
         if self.settings.os == "Windows":
             # Deleting old b2 binaries
             _remove_if_exists(tools_build_folder + "\\src\\engine\\bin.ntx86\\b2.exe")
@@ -206,27 +1299,59 @@ class BoostConan(ConanFile):
                     print(fin.read(), end="")
                 print("\n----------")
             raise
-        b2_exe = "b2.exe" if self.settings.os == "Windows" else "b2"
-        shutil.copy(os.path.join(tools_build_folder, b2_exe), boost_source_folder)
 
     def _b2_headers(self, abs_source_folder):
-        command = "cd %s && " % (os.path.join(abs_source_folder, "boost"))
-        command += ".\\b2 headers" if self.settings.os == "Windows" else "./b2 headers"
-        self.output.info("Running: %s" % command)
-        self.run(command)
+        """ Runs b2 headers unless the header tree is stamped as complete for these sources."""
+        boost_source_folder = os.path.join(abs_source_folder, "boost")
+        stamp_file = os.path.join(boost_source_folder, ".conan_headers.stamp")
+        stamp = self._headers_stamp(boost_source_folder)
+
+        # Variants sharing the source folder wait here instead of racing on the header links/copies
+        with fasteners.InterProcessLock(os.path.join(boost_source_folder, ".conan_headers.lock")):
+            if os.path.isfile(stamp_file) and \
+               os.path.isdir(os.path.join(boost_source_folder, "boost")):
+                with open(stamp_file, "r") as fin:
+                    if fin.read() == stamp:
+                        self.output.info("Headers up to date, skipping b2 headers")
+                        return
+            _remove_if_exists(stamp_file)
 
-    def _get_build_args(self, abs_source_folder, abs_build_folder):
+            command = "cd %s && " % boost_source_folder
+            command += '"%s" headers' % self._b2_exe
+            self.output.info("Running: %s" % command)
+            self.run(command)
+
+            with open(stamp_file, "w") as fout:
+                fout.write(stamp)
+
+    def _headers_stamp(self, boost_source_folder):
+        """ The Boost version and the revisions of the superproject and its submodules."""
+        stamp = "version=%s\n" % self.version
+        if os.path.isdir(os.path.join(boost_source_folder, ".git")):
+            for git_args in [["rev-parse", "HEAD"], ["submodule", "status", "--recursive"]]:
+                stamp += subprocess.check_output(["git"] + git_args, cwd=boost_source_folder,
+                                                 universal_newlines=True)
+        return stamp
+
+    def _get_build_args(self, abs_source_folder, abs_build_folder, variants=None, links=None,
+                        layout=None, user_config=None, pgo_phase=None, libraries=None,
+                        jobs=None):
         args = []
 
         # Options
+        if user_config:
+            args.append("--user-config=%s" % user_config)
         args.append("--build-dir=%s" % os.path.join(abs_build_folder, "tmp"))
-        args.append("--layout=%s" % self.options.layout)
+        args.append("--layout=%s" % (layout or self.options.layout))
         args.append("--abbreviate-paths")
-        args.append(" -j%s" % tools.cpu_count())
+        args.append(" -j%s" % (jobs or tools.cpu_count()))
         args.append(" -d2") # to print more debug info and avoid travis timing out without output
 
         # Libraries
-        args.extend(self._get_build_args_libraries())
+        if libraries:
+            args.extend("--with-%s" % libname for libname in libraries)
+        else:
+            args.extend(self._get_build_args_libraries(abs_source_folder))
 
         # Properties: Toolset
         if self.settings.compiler == "Visual Studio":
@@ -238,9 +1363,11 @@ class BoostConan(ConanFile):
             args.append("toolset=darwin")
 
         # Other properties:
-        args.append("variant=%s" % str(self.settings.build_type).lower())
+        args.append("variant=%s" % ",".join(
+            variants or [str(self.settings.build_type).lower()]))
         args.append("address-model=%s" % ("32" if self.settings.arch == "x86" else "64"))
-        args.append("link=%s" % ("static" if not self.options.shared else "shared"))
+        args.append("link=%s" % ",".join(
+            links or ["static" if not self.options.shared else "shared"]))
         if self.settings.compiler == "Visual Studio":
             args.append("runtime-link=%s" % (
                 "static" if "MT" in str(self.settings.compiler.runtime) else "shared"))
@@ -252,26 +1379,127 @@ class BoostConan(ConanFile):
                     os.path.join(abs_source_folder, "bzip2-%s" % self.bzip2_version))
         args.append('-sZLIB_SOURCE="%s"' %
                     os.path.join(abs_source_folder, "zlib-%s" % self.zlib_version))
+        if not self.options.with_lzma:
+            # Otherwise b2 links with the liblzma of the build host, if any
+            args.append("-sNO_LZMA=1")
 
         # The compiler and linker flags
-        cppflags, linkflags, defines = self._get_build_cppflags_linkflags_defines()
+        cppflags, cflags, linkflags, defines = self._get_build_flags_defines(pgo_phase)
 
         args.append('cxxflags="%s"' % " ".join(cppflags) if cppflags else "")
+        # b2 passes the cflags to the C (bzip2, zlib) and C++ compiles
+        args.append('cflags="%s"' % " ".join(cflags) if cflags else "")
         args.append('linkflags="%s"' % " ".join(linkflags) if linkflags else "")
         for define in defines:
             args.append('define=%s' % define)
+        if self.options.lto and self.settings.compiler == "Visual Studio":
+            # The other toolsets use an LTO aware archiver (see _write_user_config)
+            args.append("archiveflags=/LTCG")
+        if self.options.lean_link and self.settings.compiler == "Visual Studio":
+            # PDB files instead of the debug info in the objects (/Z7)
+            args.append("debug-store=database")
         return args
 
-    def _get_build_args_libraries(self):
-        args = []
-        for libname in LIB_LIST:
-            if getattr(self.options, "without_%s" % libname):
-                args.append("--without-%s" % libname)
-        return args
+    def _write_user_config(self, abs_build_folder):
+        """ Writes the b2 user-config.jam configuring the toolset, if the defaults do not fit.
+        Returns its path or None."""
+        lines = []
+        launcher = str(self.options.compiler_cache)
+        if self.settings.compiler == "Visual Studio":
+            if self.options.compiler_cache != "none":
+                lines.append('using msvc : %s : : <compiler>"%s cl" ;' % (self._msvc_version(),
+                                                                          launcher))
+        else:
+            toolset, compiler = self._toolset_compiler()
+            command = compiler
+            if self.options.compiler_cache != "none":
+                command = "%s %s" % (launcher, compiler)
+            toolset_options = []
+            if self.options.lto and toolset != "darwin":
+                # The objects hold the compiler IR, the archive index needs the LTO plugin
+                archiver, ranlib = {"gcc": ("gcc-ar", "gcc-ranlib"),
+                                    "clang": ("llvm-ar", "llvm-ranlib")}[toolset]
+                toolset_options = ["<archiver>%s" % archiver, "<ranlib>%s" % ranlib]
+            if command != compiler or toolset_options:
+                lines.append("using %s : : %s : %s ;" % (toolset, command,
+                                                         " ".join(toolset_options)))
+        if self.options.with_lzma:
+            lzma_root = self._lzma_root(abs_build_folder)
+            lines.append('using lzma : : <include>"%s" <search>"%s" <name>%s ;' %
+                         (os.path.join(lzma_root, "include"), os.path.join(lzma_root, "lib"),
+                          "liblzma" if self.settings.compiler == "Visual Studio" else "lzma"))
+        if not lines:
+            return None
+
+        user_config = os.path.join(abs_build_folder, "user-config.jam")
+        with open(user_config, "w") as fout:
+            fout.write("\n".join(lines) + "\n")
+        self.output.info("%s:\n%s" % (user_config, "\n".join(lines)))
+        return user_config
+
+    def _toolset_compiler(self):
+        """ The b2 toolset and the C++ compiler command (not for Visual Studio)."""
+        toolset, compiler = {"gcc": ("gcc", "g++"),
+                             "clang": ("clang", "clang++"),
+                             "apple-clang": ("darwin", "clang++")
+                            }[str(self.settings.compiler)]
+        return toolset, tools.get_env("CXX", compiler)
+
+    @contextmanager
+    def _compiler_cache(self, abs_source_folder):
+        """ Sets up the compiler cache for the builds run in this context and reports its
+        statistics at the end."""
+        if self.options.compiler_cache == "none":
+            yield
+            return
+
+        settings_key = hashlib.sha1(str(self.settings.values.as_list()).encode()).hexdigest()
+        cache_dir = _cache_folder("compiler_cache", str(self.options.compiler_cache),
+                                  settings_key[:16])
+        if self.options.compiler_cache == "ccache":
+            # The base dir makes the hits independent of the (per package) build folder
+            env = {"CCACHE_DIR": cache_dir, "CCACHE_BASEDIR": abs_source_folder}
+            zero_stats, show_stats = "ccache -z", "ccache -s"
+        else:
+            # A server keeps using the cache folder it was started with: one server (port) per
+            # cache folder, the servers of the concurrent builds are left running
+            env = {"SCCACHE_DIR": cache_dir,
+                   "SCCACHE_SERVER_PORT": str(4227 + int(settings_key[:8], 16) % 20000)}
+            zero_stats, show_stats = "sccache --zero-stats", "sccache --show-stats"
+
+        self.output.info("Compiler cache: %s" % cache_dir)
+        with tools.environment_append(env):
+            self.run(zero_stats)
+            try:
+                yield
+            finally:
+                self.output.info("Compiler cache statistics:")
+                self.run(show_stats)
 
-    def _get_build_cppflags_linkflags_defines(self):
-        """ C++ compiler flags, linker flags and defines. """
+    def _present_libraries(self, abs_source_folder):
+        """ The libraries in the source tree, b2 rejects the unknown ones (shallow source)."""
+        return [libname for libname in LIB_LIST
+                if os.path.isdir(os.path.join(abs_source_folder, "boost", "libs", libname,
+                                              "build"))]
+
+    def _enabled_libraries(self, abs_source_folder):
+        return [libname for libname in self._present_libraries(abs_source_folder)
+                if not getattr(self.options, "without_%s" % libname)]
+
+    def _get_build_args_libraries(self, abs_source_folder):
+        enabled = self._enabled_libraries(abs_source_folder)
+        disabled = [libname for libname in self._present_libraries(abs_source_folder)
+                    if libname not in enabled]
+        # b2 does not accept both, the shorter list is used
+        if enabled and len(enabled) < len(disabled):
+            return ["--with-%s" % libname for libname in enabled]
+        return ["--without-%s" % libname for libname in disabled]
+
+    def _get_build_flags_defines(self, pgo_phase=None):
+        """ C++ compiler flags, C and C++ compiler flags, linker flags and defines.
+        pgo_phase: None, "generate" (instrumented build) or "use" (optimized build)"""
         cppflags = []
+        cflags = []
         linkflags = []
         defines = []
 
@@ -286,7 +1514,7 @@ class BoostConan(ConanFile):
         # FPIC
         if self.settings.compiler != "Visual Studio":
             if self.options.fPIC:
-                cppflags.append("-fPIC")
+                cflags.append("-fPIC")
 
         # The libcxx settings
         # Note: See https://gcc.gnu.org/onlinedocs/libstdc++/manual/using_dual_abi.html
@@ -305,7 +1533,64 @@ class BoostConan(ConanFile):
                 cppflags.append("-stdlib=libstdc++")
                 linkflags.append("-stdlib=libstdc++")
 
-        return cppflags, linkflags, defines
+        # Instruction set
+        march = str(self.options.march)
+        if march != "none":
+            if self.settings.compiler == "Visual Studio":
+                arch_flag = MARCH_LEVELS[march][1] if march in MARCH_LEVELS else "/arch:" + march
+                if arch_flag:
+                    cflags.append(arch_flag)
+            else:
+                cflags.extend(MARCH_LEVELS[march][0] if march in MARCH_LEVELS
+                                else ["-march=" + march])
+
+        # Lean link: sections garbage collected by the link, debug info out of the objects
+        if self.options.lean_link:
+            if self.settings.compiler == "Visual Studio":
+                cflags.extend(["/Gy", "/Gw", "/FS"])
+                linkflags.extend(["/OPT:REF", "/OPT:ICF"])
+            else:
+                cflags.extend(["-ffunction-sections", "-fdata-sections"])
+                if self.settings.os == "Macos":
+                    linkflags.append("-Wl,-dead_strip")
+                else:
+                    linkflags.append("-Wl,--gc-sections")
+                    # Split DWARF is an ELF feature, MinGW does not support it
+                    if self.settings.build_type == "Debug" and \
+                            self.settings.os not in ("Windows", "Macos"):
+                        cflags.append("-gsplit-dwarf")
+
+        # Link time optimization
+        if self.options.lto:
+            if self.settings.compiler == "Visual Studio":
+                cflags.append("/GL")
+                linkflags.append("/LTCG")
+            else:
+                cflags.append("-flto")
+                linkflags.append("-flto")
+                if self.settings.compiler == "gcc":
+                    # Machine code next to the IR, for the consumers of the static libraries
+                    # linking without LTO; also for the shared builds, which may share their
+                    # objects with the static ones (multi_variant)
+                    cflags.append("-ffat-lto-objects")
+
+        # Profile guided optimization
+        if pgo_phase == "generate":
+            pgo_flags = ["-fprofile-generate=%s" % self._pgo_profile_folder()]
+        elif pgo_phase == "use":
+            if self.settings.compiler == "gcc":
+                pgo_flags = ["-fprofile-use=%s" % self._pgo_profile_folder(),
+                             "-fprofile-correction", "-Wno-missing-profile"]
+            else:
+                pgo_flags = ["-fprofile-use=%s" % os.path.join(self._pgo_profile_folder(),
+                                                               "default.profdata"),
+                             "-Wno-profile-instr-unprofiled"]
+        else:
+            pgo_flags = []
+        cflags.extend(pgo_flags)
+        linkflags.extend(pgo_flags)
+
+        return cppflags, cflags, linkflags, defines
 
     def _msvc_version(self):
         if self.settings.compiler.version == "15":
@@ -317,32 +1602,198 @@ class BoostConan(ConanFile):
         # one copying from the source folder and the other copying from the build folder.
         self.output.info("Packaging files from: %s" % os.path.abspath("."))
         if os.path.abspath(".") == os.path.abspath(self.source_folder):
-            self.copy(pattern="*", dst="include/boost", src="boost/boost")
+            if self.options.prune_headers:
+                self._package_pruned_headers()
+            else:
+                headers_folder = os.path.abspath(os.path.join("boost", "boost"))
+                self._package_files("headers", [
+                    (os.path.join(root, name),
+                     os.path.join(self.package_folder, "include", "boost",
+                                  os.path.relpath(os.path.join(root, name), headers_folder)))
+                    # b2 headers links the module folders on POSIX
+                    for root, _, files in os.walk(headers_folder, followlinks=True)
+                    for name in files])
         else:
-            self.copy(pattern="*.a", dst="lib", src="stage/lib")
-            self.copy(pattern="*.so", dst="lib", src="stage/lib")
-            self.copy(pattern="*.so.*", dst="lib", src="stage/lib")
-            self.copy(pattern="*.dylib*", dst="lib", src="stage/lib")
-            self.copy(pattern="*.lib", dst="lib", src="stage/lib")
-            self.copy(pattern="*.dll", dst="bin", src="stage/lib")
+            lib_patterns = {"lib": ["*.a", "*.so", "*.so.*", "*.dylib*", "*.lib"],
+                            "bin": ["*.dll"]}
+            stage_lib_folder = os.path.abspath(os.path.join("stage", "lib"))
+            files = []
+            stage_files = os.listdir(stage_lib_folder) if os.path.isdir(stage_lib_folder) else []
+            for name in sorted(stage_files):
+                for dst, patterns in lib_patterns.items():
+                    if any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                        files.append((os.path.join(stage_lib_folder, name),
+                                      os.path.join(self.package_folder, dst, name)))
+            if not self.options.header_only and self.options.with_lzma:
+                # The static iostreams library needs it, the shared one may (CONAN_BOOST_LZMA_ROOT)
+                lzma_lib_folder = os.path.join(self._lzma_root(os.path.abspath(".")), "lib")
+                for name in sorted(os.listdir(lzma_lib_folder)):
+                    if "lzma" in name and any(fnmatch.fnmatch(name, pattern)
+                                              for pattern in lib_patterns["lib"]):
+                        files.append((os.path.join(lzma_lib_folder, name),
+                                      os.path.join(self.package_folder, "lib", name)))
+            # Not in the link of the consumers (package_info)
+            debug_folder = os.path.abspath(os.path.join("stage", "debug"))
+            if not self.options.header_only and self.options.lean_link:
+                files.extend((os.path.join(root, name),
+                              os.path.join(self.package_folder, "debug",
+                                           os.path.relpath(os.path.join(root, name),
+                                                           debug_folder)))
+                             for root, _, names in os.walk(debug_folder) for name in names)
+            self._package_files("libraries", files)
+            if not self.options.header_only:
+                self._write_manifest([os.path.basename(dst) for _, dst in files
+                                      if os.path.dirname(dst) == os.path.join(self.package_folder,
+                                                                              "lib")])
 
-    def package_info(self):
-        self.cpp_info.libs = tools.collect_libs(self)
-        if self.options.without_test: # remove boost_unit_test_framework
-            self.cpp_info.libs = [lib for lib in self.cpp_info.libs if "unit_test" not in lib]
+    def _write_manifest(self, lib_files):
+        """ Writes boost_libraries.json: the packaged libraries by module, in link order, with
+        the defines, system libraries and modules their consumers need (see package_info)."""
+        libs = {}
+        for name in lib_files:
+            link_name = _link_name(name)
+            if link_name:
+                libs.setdefault(_library_module(name), set()).add(link_name)
+        if self.options.shared:
+            # Linked in boost_iostreams
+            libs.pop("lzma", None)
+        system_libs = LIBRARY_SYSTEM_LIBS.get(str(self.settings.os), {})
+        dependencies = dict(LIBRARY_DEPS, iostreams=LIBRARY_DEPS["iostreams"] +
+                            ["zlib", "bzip2", "lzma"])
+
+        # LIB_LIST order, the compression libraries (iostreams) last, moving each module before
+        # the ones it links with (graph_parallel, type_erasure)
+        remaining = [name for name in LIB_LIST if name in libs] + \
+                    sorted(name for name in libs if name not in LIB_LIST)
+        ordered = []
+        while remaining:
+            module = next(name for name in remaining
+                          if not any(name in dependencies.get(other, []) for other in remaining))
+            ordered.append(module)
+            remaining.remove(module)
+
+        libraries = []
+        for module in ordered:
+            defines = []
+            if module == "python" and not self.options.shared:
+                defines.append("BOOST_PYTHON_STATIC_LIB")
+            libraries.append({
+                "name": module,
+                # The libraries of a module before the ones they extend (log_setup, log)
+                "libs": sorted(libs[module], key=lambda lib: (-len(lib), lib)),
+                "defines": defines,
+                "system_libs": system_libs.get(module, []),
+                "requires": [name for name in dependencies.get(module, []) if name in libs]})
+
+        with open(os.path.join(self.package_folder, "boost_libraries.json"), "w") as fout:
+            json.dump({"libraries": libraries}, fout, indent=2)
+
+    def _package_files(self, description, files):
+        """ Places the (source, destination) files in the package, in parallel.
+        CONAN_BOOST_PACKAGE_MODE: auto (reflink, hard link or copy), reflink (reflink or copy)
+        or copy."""
+        placer = _FilePlacer(tools.get_env("CONAN_BOOST_PACKAGE_MODE", "auto"))
+        start = time.time()
+        with ThreadPoolExecutor(tools.cpu_count() * 2) as executor:
+            for result in [executor.submit(placer.place, src, dst) for src, dst in files]:
+                result.result()
+        stats = placer.stats
+        self.output.info("Packaged %s: %s files, %.1f MB in %.2fs "
+                         "(%s reflinks, %s hard links, %s copies)" %
+                         (description, stats["files"], stats["bytes"] / 1e6, time.time() - start,
+                          stats["reflink"], stats["hardlink"], stats["copy"]))
 
-        self.output.info("LIBRARIES: %s" % self.cpp_info.libs)
+    def _package_pruned_headers(self):
+        boost_source_folder = os.path.abspath("boost")
+        public_headers = []
+        modules = self._header_libraries() + [libname for libname in LIB_LIST
+                                              if not getattr(self.options, "without_%s" % libname)]
+        for module in modules:
+            module_include = os.path.join(boost_source_folder, module_path(module), "include")
+            if os.path.isdir(module_include):
+                # Git source: the module headers are in its own include folder
+                for root, _, files in os.walk(module_include):
+                    public_headers.extend(os.path.relpath(os.path.join(root, name), module_include)
+                                          for name in files)
+            else:
+                # Archive source: the module headers are merged in boost/
+                module_name = "boost/%s" % module.replace("~", "/")
+                if os.path.isfile(os.path.join(boost_source_folder, module_name + ".hpp")):
+                    public_headers.append(module_name + ".hpp")
+                for root, _, files in os.walk(os.path.join(boost_source_folder, module_name)):
+                    public_headers.extend(os.path.relpath(os.path.join(root, name),
+                                                          boost_source_folder)
+                                          for name in files)
+        public_headers = [header.replace(os.sep, "/") for header in public_headers]
+        headers = sorted(_header_closure(boost_source_folder, [
+            header for header in public_headers
+            if os.path.isfile(os.path.join(boost_source_folder, header))]))
+
+        all_count, all_size = 0, 0
+        for root, _, files in os.walk(os.path.join(boost_source_folder, "boost"),
+                                       followlinks=True):
+            all_count += len(files)
+            all_size += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        pruned_size = sum(os.path.getsize(os.path.join(boost_source_folder, header))
+                          for header in headers)
+        self.output.info("Pruned headers: %s of %s files, %.1f of %.1f MB" %
+                         (len(headers), all_count, pruned_size / 1e6, all_size / 1e6))
+
+        self._package_files("headers", [(os.path.join(boost_source_folder, header),
+                                         os.path.join(self.package_folder, "include", header))
+                                        for header in headers])
 
+    def package_info(self):
+        defines = []
         if not self.options.header_only and self.options.shared:
-            self.cpp_info.defines.append("BOOST_ALL_DYN_LINK")
+            defines.append("BOOST_ALL_DYN_LINK")
         else:
-            self.cpp_info.defines.append("BOOST_USE_STATIC_LIBS")
+            defines.append("BOOST_USE_STATIC_LIBS")
 
         if not self.options.header_only:
-            if not self.options.without_python:
-                if not self.options.shared:
-                    self.cpp_info.defines.append("BOOST_PYTHON_STATIC_LIB")
-
             if self.settings.compiler == "Visual Studio":
                 # DISABLES AUTO LINKING! NO SMART AND MAGIC DECISIONS THANKS!
-                self.cpp_info.defines.extend(["BOOST_ALL_NO_LIB"])
+                defines.extend(["BOOST_ALL_NO_LIB"])
+
+        manifest_path = os.path.join(self.package_folder, "boost_libraries.json")
+        if not os.path.isfile(manifest_path):
+            # Header only package, or packaged before the manifest
+            self.cpp_info.libs = tools.collect_libs(self)
+            if self.options.without_test: # remove boost_unit_test_framework
+                self.cpp_info.libs = [lib for lib in self.cpp_info.libs if "unit_test" not in lib]
+            if not self.options.header_only:
+                if not self.options.without_python:
+                    if not self.options.shared:
+                        defines.append("BOOST_PYTHON_STATIC_LIB")
+            self.cpp_info.defines.extend(defines)
+            self.output.info("LIBRARIES: %s" % self.cpp_info.libs)
+            return
+
+        with open(manifest_path, "r") as fin:
+            libraries = json.load(fin)["libraries"]
+        if hasattr(self.cpp_info, "components"):
+            # One component per module, the consumers link only the modules they require
+            headers = self.cpp_info.components["headers"]
+            headers.defines = defines
+            for library in libraries:
+                component = self.cpp_info.components[library["name"]]
+                component.libs = library["libs"]
+                component.defines = library["defines"]
+                component.system_libs = library["system_libs"]
+                component.requires = ["headers"] + library["requires"]
+        else:
+            self.cpp_info.defines.extend(defines)
+            for library in libraries:
+                self.cpp_info.libs.extend(library["libs"])
+                self.cpp_info.defines.extend(library["defines"])
+            system_libs = []
+            for library in libraries:
+                for lib in library["system_libs"]:
+                    if lib not in system_libs:
+                        system_libs.append(lib)
+            if hasattr(self.cpp_info, "system_libs"):
+                self.cpp_info.system_libs.extend(system_libs)
+            else:
+                self.cpp_info.libs.extend(system_libs)
+        self.output.info("LIBRARIES: %s" % [lib for library in libraries
+                                            for lib in library["libs"]])
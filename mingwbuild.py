@@ -4,28 +4,30 @@ from conan.packager import ConanMultiPackager
 if __name__ == "__main__":
     gcc_version = "7.2"
 
+    # All the variants are compiled by the first build (multi_variant=all), the others only
+    # stage their libraries from its output.
     builder = ConanMultiPackager()
     # libcxx is always libstdc++11 for MingW
     builder.add(
         settings={"compiler": "gcc", "compiler.version": str(gcc_version),
                   "compiler.libcxx": "libstdc++11",
                   "arch": "x86_64", "build_type": "Release"},
-        options={"Boost:shared": "True"})
+        options={"Boost:shared": "True", "Boost:multi_variant": "all"})
     builder.add(
         settings={"compiler": "gcc", "compiler.version": str(gcc_version),
                   "compiler.libcxx": "libstdc++11",
                   "arch": "x86_64", "build_type": "Debug"},
-        options={"Boost:shared": "True"})
+        options={"Boost:shared": "True", "Boost:multi_variant": "all"})
     builder.add(
         settings={"compiler": "gcc", "compiler.version": str(gcc_version),
                   "compiler.libcxx": "libstdc++11",
                   "arch": "x86_64", "build_type": "Release"},
-        options={"Boost:shared": "False"})
+        options={"Boost:shared": "False", "Boost:multi_variant": "all"})
     builder.add(
         settings={"compiler": "gcc", "compiler.version": str(gcc_version),
                   "compiler.libcxx": "libstdc++11",
                   "arch": "x86_64", "build_type": "Debug"},
-        options={"Boost:shared": "False"})
+        options={"Boost:shared": "False", "Boost:multi_variant": "all"})
 
     # The 32-bit builds fail to link.
 
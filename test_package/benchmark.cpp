@@ -0,0 +1,266 @@
+// Microbenchmarks of the compiled Boost libraries, the results are written to the file given as
+// first argument, as a JSON array of {"name", "unit", "value"} (best of the repetitions, higher
+// is better). The optional second argument is the work folder of the filesystem benchmark.
+#include <algorithm>
+#include <chrono>
+#include <fstream>
+#include <functional>
+#include <iostream>
+#include <sstream>
+#include <string>
+#include <vector>
+
+#ifdef WITH_REGEX
+#include <boost/regex.hpp>
+#endif
+#ifdef WITH_IOSTREAMS
+#include <boost/iostreams/copy.hpp>
+#include <boost/iostreams/filter/bzip2.hpp>
+#include <boost/iostreams/filter/gzip.hpp>
+#include <boost/iostreams/filtering_stream.hpp>
+#endif
+#ifdef WITH_FILESYSTEM
+#include <boost/filesystem.hpp>
+#include <boost/filesystem/fstream.hpp>
+#endif
+#ifdef WITH_PROGRAM_OPTIONS
+#include <boost/program_options.hpp>
+#endif
+#ifdef WITH_THREAD
+#include <boost/asio/io_context.hpp>
+#include <boost/asio/post.hpp>
+#include <boost/atomic.hpp>
+#include <boost/thread/thread.hpp>
+#endif
+
+namespace
+{
+
+const int repetitions = 5;
+
+struct result
+{
+    std::string name;
+    std::string unit;
+    double value;
+};
+
+std::vector<result> results;
+
+// Runs the workload, which returns the number of processed units, and records the best rate
+void measure(const std::string& name, const std::string& unit, std::function<double()> workload)
+{
+    double best = 0;
+    for (int i = 0; i < repetitions; ++i)
+    {
+        const auto start = std::chrono::steady_clock::now();
+        const double units = workload();
+        const std::chrono::duration<double> elapsed = std::chrono::steady_clock::now() - start;
+        best = std::max(best, units / std::max(elapsed.count(), 1e-9));
+    }
+    results.push_back({name, unit, best});
+    std::cout << name << ": " << best << " " << unit << std::endl;
+}
+
+std::string make_text(int lines)
+{
+    std::ostringstream text;
+    for (int i = 0; i < lines; ++i)
+    {
+        switch (i % 4)
+        {
+        case 0: text << "Subject: Re: Aw: status report " << i << "\n"; break;
+        case 1: text << "From: user" << i << "@example.com\n"; break;
+        case 2: text << "Subject: weekly numbers " << i * 7 << "\n"; break;
+        default: text << "lorem ipsum dolor sit amet " << i << " consectetur\n"; break;
+        }
+    }
+    return text.str();
+}
+
+#ifdef WITH_REGEX
+void benchmark_regex(const std::string& text)
+{
+    std::vector<std::string> lines;
+    std::istringstream input(text);
+    for (std::string line; std::getline(input, line);)
+        lines.push_back(line);
+
+    const boost::regex subject("^Subject: (Re: |Aw: )*(.*)");
+    measure("regex_match", "lines/s", [&]() {
+        std::size_t matches = 0;
+        for (const auto& line : lines)
+        {
+            boost::smatch what;
+            matches += boost::regex_match(line, what, subject) ? 1 : 0;
+        }
+        return matches > 0 ? double(lines.size()) : 0.0;
+    });
+
+    const boost::regex email("[a-z0-9]+@[a-z]+\\.com");
+    measure("regex_search", "MB/s", [&]() {
+        std::size_t matches = 0;
+        for (boost::sregex_iterator it(text.begin(), text.end(), email), end; it != end; ++it)
+            ++matches;
+        return matches > 0 ? text.size() / 1e6 : 0.0;
+    });
+}
+#endif
+
+#ifdef WITH_IOSTREAMS
+template <typename Compressor, typename Decompressor>
+void benchmark_filter(const std::string& name, const std::string& text)
+{
+    std::string compressed;
+    measure(name + "_compress", "MB/s", [&]() {
+        std::ostringstream output;
+        {
+            boost::iostreams::filtering_ostream out;
+            out.push(Compressor());
+            out.push(output);
+            out << text;
+        }
+        compressed = output.str();
+        return text.size() / 1e6;
+    });
+    measure(name + "_decompress", "MB/s", [&]() {
+        std::istringstream input(compressed);
+        std::ostringstream output;
+        boost::iostreams::filtering_istream in;
+        in.push(Decompressor());
+        in.push(input);
+        boost::iostreams::copy(in, output);
+        return output.str().size() / 1e6;
+    });
+}
+#endif
+
+#ifdef WITH_FILESYSTEM
+void benchmark_filesystem(const boost::filesystem::path& root)
+{
+    namespace fs = boost::filesystem;
+    fs::remove_all(root);
+    for (int i = 0; i < 50; ++i)
+    {
+        const fs::path folder = root / ("folder" + std::to_string(i));
+        fs::create_directories(folder);
+        for (int j = 0; j < 40; ++j)
+            fs::ofstream(folder / ("file" + std::to_string(j) + ".txt")) << i * j;
+    }
+    measure("filesystem_iteration", "entries/s", [&]() {
+        std::size_t entries = 0;
+        for (fs::recursive_directory_iterator it(root), end; it != end; ++it)
+            ++entries;
+        return double(entries);
+    });
+    fs::remove_all(root);
+}
+#endif
+
+#ifdef WITH_PROGRAM_OPTIONS
+void benchmark_program_options()
+{
+    namespace po = boost::program_options;
+    po::options_description description("Benchmark");
+    description.add_options()
+        ("help,h", "help")
+        ("verbose,v", po::value<int>()->default_value(0), "verbosity")
+        ("input,i", po::value<std::vector<std::string>>(), "inputs")
+        ("output,o", po::value<std::string>(), "output")
+        ("jobs,j", po::value<int>(), "jobs")
+        ("ratio", po::value<double>(), "ratio")
+        ("define,D", po::value<std::vector<std::string>>(), "defines");
+
+    const std::vector<std::string> arguments = {
+        "-v", "2", "--input", "a.txt", "-i", "b.txt", "--input=c.txt", "-o", "out.txt",
+        "--jobs", "8", "--ratio", "0.75", "-DNAME=value", "-D", "OTHER=1", "--define=LAST=2"};
+    std::vector<const char*> argv = {"benchmark"};
+    for (const auto& argument : arguments)
+        argv.push_back(argument.c_str());
+
+    const int parses = 5000;
+    measure("program_options_parse", "parses/s", [&]() {
+        for (int i = 0; i < parses; ++i)
+        {
+            po::variables_map values;
+            po::store(po::parse_command_line(int(argv.size()), argv.data(), description),
+                      values);
+            po::notify(values);
+        }
+        return double(parses);
+    });
+}
+#endif
+
+#ifdef WITH_THREAD
+void benchmark_dispatch()
+{
+    const int handlers = 200000;
+    const unsigned threads = std::max(2u, boost::thread::hardware_concurrency());
+    measure("asio_dispatch", "handlers/s", [&]() {
+        boost::asio::io_context context;
+        boost::atomic<int> done(0);
+        for (int i = 0; i < handlers; ++i)
+            boost::asio::post(context, [&done]() { done.fetch_add(1); });
+        boost::thread_group group;
+        for (unsigned i = 0; i < threads; ++i)
+            group.create_thread([&context]() { context.run(); });
+        group.join_all();
+        return double(done.load());
+    });
+}
+#endif
+
+std::string escape(const std::string& value)
+{
+    std::string escaped;
+    for (char c : value)
+    {
+        if (c == '"' || c == '\\')
+            escaped += '\\';
+        escaped += c;
+    }
+    return escaped;
+}
+
+}
+
+int main(int argc, char* argv[])
+{
+    if (argc < 2)
+    {
+        std::cerr << "Usage: benchmark <results.json> [work folder]" << std::endl;
+        return 1;
+    }
+    const std::string text = make_text(50000);
+#ifdef WITH_REGEX
+    benchmark_regex(text);
+#endif
+#ifdef WITH_IOSTREAMS
+    benchmark_filter<boost::iostreams::gzip_compressor,
+                     boost::iostreams::gzip_decompressor>("gzip", text);
+    benchmark_filter<boost::iostreams::bzip2_compressor,
+                     boost::iostreams::bzip2_decompressor>("bzip2", text);
+#endif
+#ifdef WITH_FILESYSTEM
+    benchmark_filesystem(argc > 2 ? argv[2] : "benchmark_work");
+#endif
+#ifdef WITH_PROGRAM_OPTIONS
+    benchmark_program_options();
+#endif
+#ifdef WITH_THREAD
+    benchmark_dispatch();
+#endif
+    (void)text;
+
+    std::ofstream output(argv[1]);
+    output << "[";
+    for (std::size_t i = 0; i < results.size(); ++i)
+    {
+        output << (i ? ",\n " : "") << "{\"name\": \"" << escape(results[i].name)
+               << "\", \"unit\": \"" << escape(results[i].unit)
+               << "\", \"value\": " << results[i].value << "}";
+    }
+    output << "]" << std::endl;
+    return output ? 0 : 1;
+}
@@ -1,8 +1,14 @@
 from conans.model.conan_file import ConanFile
-from conans import CMake
+from conans import CMake, tools
+import json
 import os
 import sys
 
+# Libraries measured by the benchmark, with their define in benchmark.cpp
+BENCHMARK_LIBRARIES = [("regex", "WITH_REGEX"), ("iostreams", "WITH_IOSTREAMS"),
+                       ("filesystem", "WITH_FILESYSTEM"),
+                       ("program_options", "WITH_PROGRAM_OPTIONS"), ("thread", "WITH_THREAD")]
+
 
 class DefaultNameConan(ConanFile):
     name = "DefaultName"
@@ -36,15 +42,85 @@ class DefaultNameConan(ConanFile):
                         cmake.definitions["BOOST_PYTHON_LIB"] = lib
                         break
 
+        if self._march_level():
+            cmake.definitions["MARCH_LEVEL"] = self._march_level()
+
         if not self.options["boost"].without_regex:
             cmake.definitions["WITH_REGEX"] = "TRUE"
             for lib in self.deps_cpp_info.libs:
                 if "regex" in lib:
                     cmake.definitions["BOOST_REGEX_LIB"] = lib
                     break
+
+        if not self.options["boost"].without_iostreams:
+            cmake.definitions["WITH_IOSTREAMS"] = "TRUE"
+            if self.options["boost"].with_lzma:
+                cmake.definitions["WITH_LZMA"] = "TRUE"
+            # The iostreams library before the compression libraries it uses (static linking)
+            libs = [lib for lib in self.deps_cpp_info["boost"].libs
+                    if any(name in lib for name in ["zlib", "bzip2", "lzma"])]
+            cmake.definitions["IOSTREAMS_LIBS"] = ";".join(
+                [lib for lib in self.deps_cpp_info["boost"].libs if "iostreams" in lib] + libs)
+
+        if self._benchmark_output():
+            cmake.definitions["BENCHMARK"] = "TRUE"
+            cmake.definitions["BENCHMARK_DEFINES"] = ";".join(
+                define for libname, define in BENCHMARK_LIBRARIES
+                if not getattr(self.options["boost"], "without_%s" % libname))
+            # Not the libraries needing other dependencies (Python, MPI) or defining main
+            cmake.definitions["BENCHMARK_LIBS"] = ";".join(
+                lib for lib in self.deps_cpp_info["boost"].libs
+                if not any(name in lib for name in ["python", "mpi", "exec_monitor",
+                                                    "unit_test"]))
         cmake.configure()
         cmake.build()
 
+    def _march_level(self):
+        # Only the x86-64 levels can be checked, the other march values are passed as is
+        if self.options["boost"].header_only:
+            return None
+        march = str(self.options["boost"].march)
+        return march[-1] if march.startswith("x86-64-v") else None
+
+    def _benchmark_output(self):
+        # CONAN_BOOST_BENCHMARK: the file the benchmark results are written to, an absolute path
+        # as the test_package build folder is a temporary one
+        if self.options["boost"].header_only:
+            return None
+        output_path = tools.get_env("CONAN_BOOST_BENCHMARK")
+        if output_path and not os.path.isabs(output_path):
+            raise RuntimeError("CONAN_BOOST_BENCHMARK should be an absolute path: %s" %
+                               output_path)
+        return output_path
+
+    def _package_info(self):
+        """ The settings and options of the tested package, from its conaninfo.txt."""
+        rootpath = self.deps_cpp_info["boost"].rootpath
+        info = {"version": self.deps_cpp_info["boost"].version,
+                "package_id": os.path.basename(rootpath), "settings": {}, "options": {}}
+        section = None
+        with open(os.path.join(rootpath, "conaninfo.txt"), "r") as fin:
+            for line in fin:
+                line = line.strip()
+                if line.startswith("["):
+                    section = line.strip("[]")
+                elif "=" in line and section in ["settings", "options"]:
+                    name, value = line.split("=", 1)
+                    info[section][name.strip()] = value.strip()
+        return info
+
+    def _run_benchmark(self):
+        self.output.info("Running: benchmark")
+        raw_results = os.path.abspath("benchmark_raw.json")
+        self.run("cd bin && .%sbenchmark %s benchmark_work" % (os.sep, raw_results))
+        results = self._package_info()
+        with open(raw_results, "r") as fin:
+            results["results"] = json.load(fin)
+        output_path = self._benchmark_output()
+        with open(output_path, "w") as fout:
+            json.dump(results, fout, indent=2, sort_keys=True)
+        self.output.info("Benchmark results written to %s" % output_path)
+
     def imports(self):
         self.copy(pattern="*.dll", dst="bin", src="bin")
         self.copy(pattern="*.dylib", dst="bin", src="lib")
@@ -54,9 +130,17 @@ class DefaultNameConan(ConanFile):
         self.output.info("Running: lambda")
         self.run("cd bin && .%slambda < %s" % (os.sep, data_file))
         if not self.options["boost"].header_only:
+            if self._march_level():
+                self.output.info("Running: march_check")
+                self.run("cd bin && .%smarch_check" % os.sep)
             if not self.options["boost"].without_regex:
                 self.output.info("Running: regex_exe")
                 self.run("cd bin && .%sregex_exe < %s" % (os.sep, data_file))
+            if not self.options["boost"].without_iostreams:
+                self.output.info("Running: iostreams_exe")
+                self.run("cd bin && .%siostreams_exe" % os.sep)
+            if self._benchmark_output():
+                self._run_benchmark()
             if not self.options["boost"].without_python:
                 os.chdir("bin")
                 sys.path.append(".")
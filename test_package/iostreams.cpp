@@ -0,0 +1,61 @@
+// Round-trips data through each compression filter of the packaged Boost.Iostreams.
+#include <iostream>
+#include <sstream>
+#include <string>
+
+#include <boost/iostreams/copy.hpp>
+#include <boost/iostreams/filter/bzip2.hpp>
+#include <boost/iostreams/filter/gzip.hpp>
+#include <boost/iostreams/filter/zlib.hpp>
+#include <boost/iostreams/filtering_stream.hpp>
+#ifdef WITH_LZMA
+#include <boost/iostreams/filter/lzma.hpp>
+#endif
+
+namespace
+{
+
+template <typename Compressor, typename Decompressor>
+bool round_trip(const std::string& name, const std::string& text)
+{
+    std::stringstream compressed;
+    {
+        boost::iostreams::filtering_ostream out;
+        out.push(Compressor());
+        out.push(compressed);
+        out << text;
+    }
+    const std::size_t compressed_size = compressed.str().size();
+    std::ostringstream decompressed;
+    boost::iostreams::filtering_istream in;
+    in.push(Decompressor());
+    in.push(compressed);
+    boost::iostreams::copy(in, decompressed);
+
+    const bool ok = decompressed.str() == text;
+    std::cout << name << ": " << text.size() << " -> " << compressed_size << " bytes, "
+              << (ok ? "OK" : "FAILED") << std::endl;
+    return ok;
+}
+
+}
+
+int main()
+{
+    std::ostringstream input;
+    for (int i = 0; i < 10000; ++i)
+        input << "line " << i << ": the quick brown fox jumps over the lazy dog\n";
+    const std::string text = input.str();
+
+    bool ok = round_trip<boost::iostreams::gzip_compressor,
+                         boost::iostreams::gzip_decompressor>("gzip", text);
+    ok = round_trip<boost::iostreams::zlib_compressor,
+                    boost::iostreams::zlib_decompressor>("zlib", text) && ok;
+    ok = round_trip<boost::iostreams::bzip2_compressor,
+                    boost::iostreams::bzip2_decompressor>("bzip2", text) && ok;
+#ifdef WITH_LZMA
+    ok = round_trip<boost::iostreams::lzma_compressor,
+                    boost::iostreams::lzma_decompressor>("lzma", text) && ok;
+#endif
+    return ok ? 0 : 1;
+}
@@ -0,0 +1,77 @@
+// Checks that the build host supports the x86-64 level (MARCH_LEVEL 2, 3 or 4) the Boost
+// libraries were compiled for. Compiled for the baseline instruction set, so it runs anywhere.
+#include <iostream>
+
+#if defined(_MSC_VER)
+#include <intrin.h>
+#endif
+
+namespace
+{
+
+#if defined(_MSC_VER)
+bool bit(int reg, int index)
+{
+    return (reg >> index) & 1;
+}
+
+int host_level()
+{
+    int info[4];
+    __cpuid(info, 0);
+    const int max_leaf = info[0];
+    __cpuid(info, 1);
+    const int ecx1 = info[2];
+    // cx16, popcnt, sse3, ssse3, sse4.1, sse4.2
+    if (!(bit(ecx1, 13) && bit(ecx1, 23) && bit(ecx1, 0) && bit(ecx1, 9) && bit(ecx1, 19) &&
+          bit(ecx1, 20)))
+        return 1;
+    // The OS has to save the AVX (and AVX-512) registers
+    if (!bit(ecx1, 27) || max_leaf < 7)
+        return 2;
+    const unsigned long long xcr0 = _xgetbv(0);
+    __cpuidex(info, 7, 0);
+    const int ebx7 = info[1];
+    // avx, fma, f16c, movbe, avx2, bmi, bmi2
+    if (!((xcr0 & 0x6) == 0x6 && bit(ecx1, 28) && bit(ecx1, 12) && bit(ecx1, 29) &&
+          bit(ecx1, 22) && bit(ebx7, 5) && bit(ebx7, 3) && bit(ebx7, 8)))
+        return 2;
+    // avx512f, avx512dq, avx512cd, avx512bw, avx512vl
+    if (!((xcr0 & 0xe6) == 0xe6 && bit(ebx7, 16) && bit(ebx7, 17) && bit(ebx7, 28) &&
+          bit(ebx7, 30) && bit(ebx7, 31)))
+        return 3;
+    return 4;
+}
+#else
+int host_level()
+{
+    __builtin_cpu_init();
+    if (!(__builtin_cpu_supports("popcnt") && __builtin_cpu_supports("sse3") &&
+          __builtin_cpu_supports("ssse3") && __builtin_cpu_supports("sse4.1") &&
+          __builtin_cpu_supports("sse4.2")))
+        return 1;
+    if (!(__builtin_cpu_supports("avx") && __builtin_cpu_supports("avx2") &&
+          __builtin_cpu_supports("bmi") && __builtin_cpu_supports("bmi2") &&
+          __builtin_cpu_supports("fma")))
+        return 2;
+    if (!(__builtin_cpu_supports("avx512f") && __builtin_cpu_supports("avx512bw") &&
+          __builtin_cpu_supports("avx512cd") && __builtin_cpu_supports("avx512dq") &&
+          __builtin_cpu_supports("avx512vl")))
+        return 3;
+    return 4;
+}
+#endif
+
+}
+
+int main()
+{
+    const int level = host_level();
+    std::cout << "Host x86-64 level: v" << level << ", package: v" << MARCH_LEVEL << std::endl;
+    if (level < MARCH_LEVEL)
+    {
+        std::cerr << "The build host does not support x86-64-v" << MARCH_LEVEL << std::endl;
+        return 1;
+    }
+    return 0;
+}
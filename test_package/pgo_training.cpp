@@ -0,0 +1,125 @@
+// Training workload for the profile guided optimization build of the Boost libraries.
+// Exercises the regex, iostreams and filesystem scenarios of the test package.
+#include <iostream>
+#include <sstream>
+#include <string>
+
+#ifdef WITH_REGEX
+#include <boost/regex.hpp>
+#endif
+#ifdef WITH_IOSTREAMS
+#include <boost/iostreams/copy.hpp>
+#include <boost/iostreams/filter/bzip2.hpp>
+#include <boost/iostreams/filter/gzip.hpp>
+#include <boost/iostreams/filtering_stream.hpp>
+#endif
+#ifdef WITH_FILESYSTEM
+#include <boost/filesystem.hpp>
+#include <boost/filesystem/fstream.hpp>
+#endif
+
+namespace
+{
+
+std::string make_text(int lines)
+{
+    std::ostringstream text;
+    for (int i = 0; i < lines; ++i)
+    {
+        switch (i % 4)
+        {
+        case 0: text << "Subject: Re: Aw: status report " << i << "\n"; break;
+        case 1: text << "From: user" << i << "@example.com\n"; break;
+        case 2: text << "Subject: weekly numbers " << i * 7 << "\n"; break;
+        default: text << "lorem ipsum dolor sit amet " << i << " consectetur\n"; break;
+        }
+    }
+    return text.str();
+}
+
+#ifdef WITH_REGEX
+std::size_t train_regex(const std::string& text)
+{
+    const boost::regex subject("^Subject: (Re: |Aw: )*(.*)");
+    const boost::regex email("[a-z0-9]+@[a-z]+\\.com");
+    std::size_t matches = 0;
+    std::istringstream lines(text);
+    std::string line;
+    while (std::getline(lines, line))
+    {
+        boost::smatch what;
+        if (boost::regex_match(line, what, subject))
+            ++matches;
+    }
+    for (boost::sregex_iterator it(text.begin(), text.end(), email), end; it != end; ++it)
+        ++matches;
+    return matches;
+}
+#endif
+
+#ifdef WITH_IOSTREAMS
+template <typename Compressor, typename Decompressor>
+std::size_t train_filter(const std::string& text)
+{
+    std::stringstream compressed;
+    {
+        boost::iostreams::filtering_ostream out;
+        out.push(Compressor());
+        out.push(compressed);
+        out << text;
+    }
+    std::ostringstream decompressed;
+    boost::iostreams::filtering_istream in;
+    in.push(Decompressor());
+    in.push(compressed);
+    boost::iostreams::copy(in, decompressed);
+    return decompressed.str().size();
+}
+#endif
+
+#ifdef WITH_FILESYSTEM
+std::size_t train_filesystem(const boost::filesystem::path& root)
+{
+    namespace fs = boost::filesystem;
+    fs::remove_all(root);
+    for (int i = 0; i < 20; ++i)
+    {
+        const fs::path folder = root / ("folder" + std::to_string(i));
+        fs::create_directories(folder);
+        for (int j = 0; j < 20; ++j)
+            fs::ofstream(folder / ("file" + std::to_string(j) + ".txt")) << i * j;
+    }
+    std::size_t files = 0;
+    for (int round = 0; round < 10; ++round)
+        for (fs::recursive_directory_iterator it(root), end; it != end; ++it)
+            if (fs::is_regular_file(it->status()))
+                files += fs::file_size(it->path()) > 0 ? 1 : 0;
+    fs::remove_all(root);
+    return files;
+}
+#endif
+
+}
+
+int main(int argc, char* argv[])
+{
+    const std::string text = make_text(20000);
+    std::size_t result = 0;
+    for (int round = 0; round < 5; ++round)
+    {
+#ifdef WITH_REGEX
+        result += train_regex(text);
+#endif
+#ifdef WITH_IOSTREAMS
+        result += train_filter<boost::iostreams::gzip_compressor,
+                               boost::iostreams::gzip_decompressor>(text);
+        result += train_filter<boost::iostreams::bzip2_compressor,
+                               boost::iostreams::bzip2_decompressor>(text);
+#endif
+    }
+#ifdef WITH_FILESYSTEM
+    result += train_filesystem(argc > 1 ? argv[1] : "pgo_training_work");
+#endif
+    std::cout << "Training result: " << result << std::endl;
+    return 0;
+}
@@ -8,6 +8,8 @@ if __name__ == "__main__":
         visual_versions=[visual_studio_version],
         archs=["x86_64"])
     builder_64.add_common_builds(shared_option_name="Boost:shared", pure_c=False)
+    for build in builder_64.builds:
+        build.options["Boost:multi_variant"] = "all"
     #print(builder_64.builds)
     builder_64.run()
 
@@ -16,5 +18,7 @@ if __name__ == "__main__":
         archs=["x86"],
         build_types=["Release"])
     builder_32_release.add_common_builds(shared_option_name="Boost:shared", pure_c=False)
+    for build in builder_32_release.builds:
+        build.options["Boost:multi_variant"] = "link"
     #print(builder_32_release.builds)
     builder_32_release.run()